@@ -1,4 +1,4 @@
-from cubevis.colorizer.utils import get_colorizer
+from cubevis.colorizer.utils import get_colorizer, render_variants, variant_states
 from cubevis.colorizer.colorizer import BaseColorizer
 from cubevis.colorizer.fto import *
 from cubevis.colorizer.fivebyfive import *
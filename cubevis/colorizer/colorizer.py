@@ -1,5 +1,8 @@
 import re
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Tuple
 
 import numpy as np
 
@@ -22,21 +25,108 @@ colors = {
 }
 
 
+svg_style = "polygon { stroke: black; stroke-width: 0.5px; stroke-linejoin: round;}"
+
+# Optimized svgs use integer coordinates on a viewBox scaled by this factor, their style can be
+# hoisted into the page that shows them.
+optimized_svg_scale = 10
+optimized_svg_style = f"svg.cubevis path {{ stroke: black; stroke-width: {0.5 * optimized_svg_scale:g}px; stroke-linejoin: round;}}"
+
+# One character per sticker in compact color strings, "." marks a sticker without color.
+color_chars = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def normalized_vertices(vertices: np.ndarray) -> np.ndarray:
+    """Scale vertices into the 5..95 box of the svg viewBox."""
+    vertices = vertices - vertices.min(axis=0)
+    max_coord = vertices.max()
+    vertices = vertices / max_coord * 90
+    vertices += 5
+    return vertices
+
+
 class BaseColorizer:
-    def __init__(self, cube: Cube, pre_moves="") -> None:
+    # Maximum number of distinct renders kept per colorizer, least recently used go first.
+    render_cache_size = 4096
+    # Normalized (vertices, polygons) per build_geometry implementation, shared by all instances.
+    shared_geometry = {}
+
+    def __init__(self, cube: Cube, pre_moves="", post_moves="") -> None:
         self.vertices = np.zeros((0,))
         self.polygons = {}
         self.cube = cube
         self.width = 100
         self.height = 100
         self.pre_moves = pre_moves
-        pass
+        self.post_moves = post_moves
+        self.svg_template = None
+        self.sticker_table = None
+        self.render_cache = OrderedDict()
+        self.optimized_svg_template = None
+        self.optimized_render_cache = OrderedDict()
+        # Guards the compiled tables above, which are built on first use
+        self.compile_lock = threading.Lock()
+        self.render_cache_lock = threading.Lock()
+        self.load_geometry()
+
+    def compiled(self, name, compile):
+        """Attribute ``name``, set to ``compile()`` on first use.
+
+        Colors and geometry are only final once the subclass constructor ran, so the tables can't be
+        built in ``__init__``. The lock makes threads sharing a colorizer build each of them once."""
+        value = getattr(self, name)
+        if value is None:
+            with self.compile_lock:
+                value = getattr(self, name)
+                if value is None:
+                    value = compile()
+                    setattr(self, name, value)
+        return value
+
+    def memoized(self, cache, key, render):
+        """``render()``, kept in the LRU ``cache`` under ``key`` with at most ``render_cache_size`` entries."""
+        with self.render_cache_lock:
+            svg = cache.get(key)
+            if svg is not None:
+                cache.move_to_end(key)
+                return svg
+        svg = render()
+        with self.render_cache_lock:
+            cache[key] = svg
+            while len(cache) > self.render_cache_size:
+                cache.popitem(last=False)
+        return svg
+
+    def build_geometry(self) -> Tuple[np.ndarray, Dict[str, List[int]]]:
+        """Return the raw vertices of the drawing and the polygons built along with them, if any.
+
+        Only called once per class, load_geometry normalizes the result and shares it between instances."""
+        return np.zeros((0, 2)), {}
+
+    def load_geometry(self):
+        build = type(self).build_geometry
+        geometry = BaseColorizer.shared_geometry.get(build)
+        if geometry is None:
+            vertices, polygons = self.build_geometry()
+            vertices = np.array(vertices, dtype=float)
+            if len(vertices) > 0:
+                vertices = normalized_vertices(vertices)
+            vertices.flags.writeable = False
+            # Every instance gets the same objects, so none of them may change them
+            frozen = {}
+            for name, picking in polygons.items():
+                picking = np.array(picking, dtype=np.intp)
+                picking.flags.writeable = False
+                frozen[name] = picking
+            geometry = (vertices, MappingProxyType(frozen))
+            BaseColorizer.shared_geometry[build] = geometry
+        self.vertices, self.polygons = geometry
+        if len(self.vertices) > 0:
+            self.width = self.vertices[:, 0].max() + 5
+            self.height = self.vertices[:, 1].max() + 5
 
     def normalize_vertices(self):
-        self.vertices -= self.vertices.min(axis=0)
-        max_coord = self.vertices.max()
-        self.vertices = self.vertices / max_coord * 90
-        self.vertices += 5
+        self.vertices = normalized_vertices(self.vertices)
         self.width = self.vertices[:, 0].max() + 5
         self.height = self.vertices[:, 1].max() + 5
 
@@ -68,55 +158,217 @@ class BaseColorizer:
         """Return a dictionary that maps from pieces in a given orientation to colors which defines an override for stickers of a piece that sholud be ignored. Use this if the location of ignored stickers isn't always the same."""
         return dict()
 
-    def get_sticker_colors_from_cube(self) -> Dict[str, str]:
-        sticker_positions_to_color = {}
+    def piece_sticker_color(self, piece, i, face_to_color, override_pieces):
+        """Color of sticker ``i`` of ``piece``, or ``None`` if it has no color."""
+        non_numeric_piece = "".join([c for c in piece if not c.isnumeric()])
+        last_digit = piece[-1] if piece[-1].isnumeric() else ""
+        piece_stickers = self.make_stickers_from_piece(non_numeric_piece)
+        if last_digit != "" and piece_stickers[i] + last_digit in override_pieces:
+            return override_pieces[piece_stickers[i] + last_digit]
+        if piece_stickers[i] in override_pieces:
+            return override_pieces[piece_stickers[i]]
+        try:
+            return face_to_color[non_numeric_piece[i]]
+        except KeyError:
+            return None
+
+    def compile_sticker_colors(self):
+        """Precompute the color of every sticker slot for any piece and orientation.
+
+        A slot is one sticker of one location. A piece ``p`` with orientation ``o`` at a location
+        puts its sticker ``(j - o) % len(p)`` into slot ``j``, so the color of a slot is an entry of
+        ``piece_colors`` and a whole state resolves with one take. Colors are indices into
+        ``palette``, -1 means no color, and the override colors are folded into ``base_colors``."""
+        palette = []
+        palette_index = {}
+        sticker_names = list(self.get_polygons() or {})
+        sticker_index = {name: i for i, name in enumerate(sticker_names)}
+
+        def color_index(color):
+            if color not in palette_index:
+                palette_index[color] = len(palette)
+                palette.append(color)
+            return palette_index[color]
+
+        def sticker(name):
+            if name not in sticker_index:
+                sticker_index[name] = len(sticker_names)
+                sticker_names.append(name)
+            return sticker_index[name]
+
         face_to_color = self.get_face_to_color()
         override_pieces = self.get_override_pieces()
-        for position, (piece, ori) in self.cube.pieces.items():
-            non_numeric_piece = "".join([c for c in piece if not c.isnumeric()])
-            last_digit = piece[-1] if piece[-1].isnumeric() else ""
-            piece_stickers = self.make_stickers_from_piece(non_numeric_piece)
-            sticker_positions = self.make_stickers_from_piece(position)
-            for i in range(len(non_numeric_piece)):
-                ival = (i + ori) % len(non_numeric_piece)
-                try:
-                    if last_digit != "" and piece_stickers[i] + last_digit in override_pieces:
-                        sticker_positions_to_color[sticker_positions[ival]] = (
-                            override_pieces[piece_stickers[i] + last_digit]
-                        )
-                    elif piece_stickers[i] in override_pieces:
-                        sticker_positions_to_color[sticker_positions[ival]] = (
-                            override_pieces[piece_stickers[i]]
-                        )
-                    else:
-                        sticker_positions_to_color[sticker_positions[ival]] = (
-                            face_to_color[non_numeric_piece[i]]
-                        )
-                except:
-                    pass
-        for k, v in self.get_override_colors().items():
-            sticker_positions_to_color[k] = v
-        return sticker_positions_to_color
+        override_colors = self.get_override_colors()
+        piece_names = self.cube.piece_names
+        piece_lengths = np.array([len([c for c in p if not c.isnumeric()]) for p in piece_names], dtype=np.intp)
+        width = max(1, int(piece_lengths.max(initial=0)))
+        piece_colors = np.full((len(piece_names), width), -1, dtype=np.int16)
+        for p, piece in enumerate(piece_names):
+            for i in range(piece_lengths[p]):
+                color = self.piece_sticker_color(piece, i, face_to_color, override_pieces)
+                if color is not None:
+                    piece_colors[p, i] = color_index(color)
 
-    def create_svg(self):
-        style = "polygon { stroke: black; stroke-width: 0.5px; stroke-linejoin: round;}"
-        svg = f"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {self.width} {self.height}">
+        slot_location, slot_index, slot_sticker = [], [], []
+        for location, position in enumerate(piece_names):
+            for j, name in enumerate(self.make_stickers_from_piece(position)):
+                if name in override_colors:
+                    continue
+                slot_location.append(location)
+                slot_index.append(j)
+                slot_sticker.append(sticker(name))
+
+        overrides = [(sticker(name), color_index(color)) for name, color in override_colors.items()]
+        base_colors = np.full(len(sticker_names), -1, dtype=np.int16)
+        for index, color in overrides:
+            base_colors[index] = color
+        return {
+            "palette": palette,
+            "sticker_names": sticker_names,
+            "piece_lengths": piece_lengths,
+            "piece_colors": piece_colors.ravel(),
+            "width": width,
+            "slot_location": np.array(slot_location, dtype=np.intp),
+            "slot_index": np.array(slot_index, dtype=np.intp),
+            "slot_sticker": np.array(slot_sticker, dtype=np.intp),
+            "base_colors": base_colors,
+        }
+
+    def sticker_color_indices(self, perm, ori) -> np.ndarray:
+        """Palette index of every sticker in ``sticker_table["sticker_names"]`` order for a state, -1 for no color."""
+        table = self.compiled("sticker_table", self.compile_sticker_colors)
+        location = table["slot_location"]
+        pieces = perm[location]
+        lengths = table["piece_lengths"][pieces]
+        sticker = (table["slot_index"] - ori[location]) % np.maximum(lengths, 1)
+        slot_colors = table["piece_colors"].take(pieces * table["width"] + sticker)
+        colored = (table["slot_index"] < lengths) & (slot_colors >= 0)
+        colors = table["base_colors"].copy()
+        colors[table["slot_sticker"][colored]] = slot_colors[colored]
+        return colors
+
+    def get_sticker_colors_from_cube(self) -> Dict[str, str]:
+        colors = self.sticker_color_indices(self.cube.perm, self.cube.ori)
+        palette = self.sticker_table["palette"]
+        return {
+            name: palette[color]
+            for name, color in zip(self.sticker_table["sticker_names"], colors.tolist())
+            if color >= 0
+        }
+
+    def compile_svg(self):
+        """Format the parts of the svg that only depend on the geometry: the header and, for every
+        sticker, the text following its fill color. Geometry is fixed once the colorizer is built."""
+        header = f"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {self.width} {self.height}">
 <style>
-{style}
+{svg_style}
 </style>"""
-        sticker_colors = self.get_sticker_colors_from_cube()
-        polygons = self.get_polygons()
-        for sticker_name, polygon_picking in polygons.items():
-            poygon_str = " ".join(
+        slots = []
+        for sticker_name, polygon_picking in self.get_polygons().items():
+            polygon_str = " ".join(
                 [f"{a:.2f} {b:.2f}" for (a, b) in self.vertices[polygon_picking]]
             )
-            try:
-                svg += f"<polygon fill='{sticker_colors[sticker_name]}' points='{poygon_str}'/>\n"
-            except:
-                # TODO: log warning
-                pass
-        svg += "</svg>"
-        return svg
+            slots.append((sticker_name, f"' points='{polygon_str}'/>\n"))
+        return header, slots
+
+    def svg_geometry(self) -> dict:
+        """Everything needed to draw this colorizer's svgs from color strings: view box, style,
+        vertices (rounded like in the svg), polygons as vertex index lists and the palette."""
+        self.compiled("sticker_table", self.compile_sticker_colors)
+        return {
+            "viewBox": f"0 0 {self.width} {self.height}",
+            "style": svg_style,
+            "vertices": [[float(f"{a:.2f}"), float(f"{b:.2f}")] for (a, b) in self.vertices],
+            "polygons": [[int(i) for i in polygon] for polygon in self.get_polygons().values()],
+            "palette": self.sticker_table["palette"],
+        }
+
+    def color_string(self, state) -> str:
+        """Palette index of every polygon of ``state`` as one character each, see ``svg_geometry``."""
+        colors = self.sticker_color_indices(state.perm, state.ori)
+        if len(self.sticker_table["palette"]) > len(color_chars):
+            raise ValueError(f"Palette of {len(self.sticker_table['palette'])} colors is too large for color strings")
+        num_polygons = len(self.get_polygons())
+        return "".join(color_chars[c] if c >= 0 else "." for c in colors[:num_polygons].tolist())
+
+    def render(self, state) -> str:
+        """Svg of ``state``. Doesn't touch ``self.cube``, so one instance can render from many threads:
+        the compiled tables are built once under ``compile_lock`` and the memo has its own lock.
+
+        Renders are memoized by the sticker color vector, so states that look the same, like OLL
+        cases differing only in grayed out stickers, are formatted once. The memo keeps the
+        ``render_cache_size`` most recently used svgs."""
+        colors = self.sticker_color_indices(state.perm, state.ori)
+        return self.memoized(self.render_cache, colors.tobytes(), lambda: self.render_colors(colors.tolist()))
+
+    def render_colors(self, colors: List[int]) -> str:
+        header, slots = self.compiled("svg_template", self.compile_svg)
+        # Polygons come first in the sticker order, so slot k is colored by colors[k]
+        palette = self.compiled("sticker_table", self.compile_sticker_colors)["palette"]
+        parts = [header]
+        for (_, suffix), color in zip(slots, colors):
+            # Stickers without a color are left out
+            if color >= 0:
+                parts += ("<polygon fill='", palette[color], suffix)
+        parts.append("</svg>")
+        return "".join(parts)
+
+    def compile_optimized_svg(self):
+        """Format the opening tag and one path outline per sticker for ``render_optimized``."""
+        open_tag = (
+            "<svg xmlns='http://www.w3.org/2000/svg' class='cubevis' viewBox='0 0 "
+            f"{round(self.width * optimized_svg_scale)} {round(self.height * optimized_svg_scale)}'>"
+        )
+        outlines = []
+        for polygon_picking in self.get_polygons().values():
+            points = np.rint(self.vertices[polygon_picking] * optimized_svg_scale).astype(int)
+            outlines.append("M" + " ".join(f"{x} {y}" for x, y in points.tolist()) + "Z")
+        return open_tag, outlines
+
+    def render_optimized(self, state, inline_style=True) -> str:
+        """Smaller svg of ``state``: the stickers of every color are merged into one path and
+        coordinates are integers. Without ``inline_style`` the page showing the svg has to provide
+        ``optimized_svg_style``."""
+        colors = self.sticker_color_indices(state.perm, state.ori)
+        key = (colors.tobytes(), inline_style)
+        return self.memoized(
+            self.optimized_render_cache, key, lambda: self.render_optimized_colors(colors.tolist(), inline_style)
+        )
+
+    def render_optimized_colors(self, colors: List[int], inline_style=True) -> str:
+        open_tag, outlines = self.compiled("optimized_svg_template", self.compile_optimized_svg)
+        palette = self.compiled("sticker_table", self.compile_sticker_colors)["palette"]
+        outlines_by_color = {}
+        for outline, color in zip(outlines, colors):
+            if color >= 0:
+                outlines_by_color.setdefault(color, []).append(outline)
+        parts = [open_tag]
+        if inline_style:
+            parts.append(f"<style>{optimized_svg_style}</style>")
+        for color, color_outlines in outlines_by_color.items():
+            parts += ("<path fill='", palette[color], "' d='", "".join(color_outlines), "'/>")
+        parts.append("</svg>")
+        return "".join(parts)
+
+    def create_svg(self):
+        return self.render(self.cube.state)
+
+    def inverse_state(self, moves, reference_rotation):
+        """State shown for the inverse of ``moves`` after undoing ``reference_rotation``."""
+        state = self.cube.state_after(self.pre_moves)
+        state = self.cube.state_after(reference_rotation, inverse=True, state=state)
+        state = self.cube.state_after(moves, inverse=True, state=state)
+        return self.cube.state_after(self.post_moves, state=state)
+
+    def state_for(self, alg, inverse=False, ref_rot_override=None):
+        """State that ``scramble(alg)`` or, with ``inverse``, ``inverse(alg)`` renders, without touching ``self.cube``."""
+        if not inverse:
+            return self.cube.state_after(" ".join([self.pre_moves, alg, self.post_moves]).strip())
+        moves = " ".join(re.findall(r"\d?[A-z]+'?\d?'?", alg))
+        reference_rotation = self.cube.to_reference_rotation(
+            scramble=False, override_piece=ref_rot_override, state=self.cube.state_after(moves)
+        )
+        return self.inverse_state(moves, reference_rotation)
 
     def inverse(self, moves, path=None, ref_rot_override=None):
         moves = re.findall(r"\d?[A-z]+'?\d?'?", moves)
@@ -128,10 +380,10 @@ class BaseColorizer:
                 rotations = [move] + rotations
             inverted_moves.append(inverted)
         scramble = " ".join(inverted_moves)
-        self.cube.scramble(" ".join(moves))
-        rotation = self.cube.to_reference_rotation(
-            scramble=False, override_piece=ref_rot_override
+        reference_rotation = self.cube.to_reference_rotation(
+            scramble=False, override_piece=ref_rot_override, state=self.cube.state_after(" ".join(moves))
         )
+        rotation = reference_rotation
         if rotation != "":
             rotation = (
                 " ".join(
@@ -143,11 +395,16 @@ class BaseColorizer:
                 + " "
             )
 
-        self.scramble(rotation + scramble, path)
+        # The state is built from the compiled transforms instead of replaying the inverted string
+        self.cube.state = self.inverse_state(" ".join(moves), reference_rotation)
+        self.write_svg(path)
         return rotation + scramble
 
     def scramble(self, moves, path=None):
-        self.cube.scramble(" ".join([self.pre_moves, moves]).strip())
+        self.cube.scramble(" ".join([self.pre_moves, moves, self.post_moves]).strip())
+        return self.write_svg(path)
+
+    def write_svg(self, path=None):
         svg = self.create_svg()
         if path is None:
             return svg
@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict
 
@@ -8,15 +9,22 @@ from cubevis.colorizer.colorizer import BaseColorizer, colors
 from cubevis.cube import FiveByFive
 
 
+@lru_cache(maxsize=None)
+def load_special_coords() -> dict:
+    """Coordinates and polygons of the 5x5 drawing with the side faces, read on first use."""
+    return json.loads((Path(__file__).parent / "5x5coords.json").read_text())
+
+
 class FiveByFiveColorizer(BaseColorizer):
     def __init__(self, pre_moves="") -> None:
         super().__init__(FiveByFive(), pre_moves)
-        self.vertices = []
+
+    def build_geometry(self):
+        vertices = []
         for i in range(8):
             for j in range(8):
-                self.vertices.append([j, i])
-        self.vertices = np.array(self.vertices)
-        self.normalize_vertices()
+                vertices.append([j, i])
+        return np.array(vertices), {}
 
     def get_polygons(self):
         return {
@@ -121,12 +129,9 @@ class FiveByFiveL2EColorizer(FiveByFiveColorizer):
 
 
 class FiveByFiveSpecialColorizer(FiveByFiveColorizer):
-    def __init__(self, pre_moves=""):
-        super().__init__(pre_moves)
-        coords = json.loads((Path(__file__).parent / "5x5coords.json").read_text())
-        self.vertices = np.array(coords["coordinates"])
-        self.polygons = coords["index_map"]
-        self.normalize_vertices()
+    def build_geometry(self):
+        coords = load_special_coords()
+        return np.array(coords["coordinates"]), coords["index_map"]
 
     def get_polygons(self):
         return self.polygons
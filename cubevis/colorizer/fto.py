@@ -10,7 +10,9 @@ from cubevis.cube import FTO
 class FTOColorizer(BaseColorizer):
     def __init__(self, pre_moves="") -> None:
         super().__init__(FTO(), pre_moves)
-        self.vertices = np.array(
+
+    def build_geometry(self):
+        vertices = np.array(
             [
                 [379, 438],
                 [379, 219],
@@ -39,8 +41,8 @@ class FTOColorizer(BaseColorizer):
                 [759, 658],
             ]
         )
-        self.vertices[:, 1] *= -1
-        self.normalize_vertices()
+        vertices[:, 1] *= -1
+        return vertices, {}
 
     def needs_invert(self):
         return True
@@ -228,7 +230,9 @@ class FTOOLPColorizer(FTOL3TColorizer):
 class FTOFullColorizer(FTOColorizer):
     def __init__(self, pre_moves=""):
         super().__init__(pre_moves)
-        self.vertices = np.array(
+
+    def build_geometry(self):
+        vertices = np.array(
             [
                 [26.59, 236.79],
                 [64.38, 258.64],
@@ -296,7 +300,7 @@ class FTOFullColorizer(FTOColorizer):
                 [102.63, 250.88],
             ]
         )
-        self.normalize_vertices()
+        return vertices, {}
 
     def get_polygons(self):
         return {
@@ -451,9 +455,9 @@ class FTOLBTColorizer(FTOLTBaseColorizer):
     
 
 class FTOBTLTColorizer(FTOLTBaseColorizer):
-    def scramble(self, moves, path=None):
-        moves = " ".join(["y'", moves, "y"])
-        return super().scramble(moves, path)
+    def __init__(self) -> None:
+        super().__init__("y'")
+        self.post_moves = "y"
 
     def get_override_colors(self):
         return {
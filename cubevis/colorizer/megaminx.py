@@ -3,13 +3,15 @@ from typing import Dict, List
 
 import numpy as np
 
-from cubevis.colorizer.colorizer import BaseColorizer, colors
+from cubevis.colorizer.colorizer import BaseColorizer, colors, normalized_vertices
 from cubevis.cube import Megaminx
 
 
 class MegaminxColorizer(BaseColorizer):
     def __init__(self, pre_moves="") -> None:
         super().__init__(Megaminx(), pre_moves)
+
+    def build_geometry(self):
         coords = [
             [392, 473],
             [292, 473],
@@ -47,8 +49,7 @@ class MegaminxColorizer(BaseColorizer):
             [242, 182],
             [323, 240],
         ]
-        self.vertices = np.array(coords, dtype=float)
-        self.normalize_vertices()
+        return np.array(coords, dtype=float), {}
 
     def get_polygons(self) -> Dict[str, List[int]]:
         return {
@@ -136,9 +137,9 @@ class MegaminxOLLColorizer(MegaminxColorizer):
 
 
 class MegaminxZBLSColorizer(MegaminxLLColorizer):
-    def __init__(self):
-        super().__init__()
-        verts = self.vertices
+    def build_geometry(self):
+        verts, _ = super().build_geometry()
+        verts = normalized_vertices(verts)
         new_pts = np.zeros((6, 2))
         new_pts[0] = verts[1] + (verts[1] - verts[16])
         new_pts[1] = verts[1] + 2 * (verts[1] - verts[16])
@@ -146,13 +147,12 @@ class MegaminxZBLSColorizer(MegaminxLLColorizer):
         new_pts[3] = verts[0] + 2 * (verts[0] - verts[15])
         new_pts[4] = verts[14] + (verts[14] - verts[29])
         new_pts[5] = verts[14] + 2 * (verts[14] - verts[29])
-        self.vertices = np.concatenate([verts, new_pts])
-        self.normalize_vertices()
-        self.polygons = super().get_polygons()
-        self.polygons["FR"] = [0, 1, 35, 37]
-        self.polygons["FCR"] = [35, 37, 38, 36]
-        self.polygons["RF"] = [0, 14, 39, 37]
-        self.polygons["RCF"] = [37, 39, 40, 38]
+        polygons = super().get_polygons()
+        polygons["FR"] = [0, 1, 35, 37]
+        polygons["FCR"] = [35, 37, 38, 36]
+        polygons["RF"] = [0, 14, 39, 37]
+        polygons["RCF"] = [37, 39, 40, 38]
+        return np.concatenate([verts, new_pts]), polygons
 
     def get_polygons(self):
         return self.polygons
@@ -9,6 +9,8 @@ from cubevis.cube import Pyraminx
 class PyraminxColorizer(BaseColorizer):
     def __init__(self) -> None:
         super().__init__(Pyraminx())
+
+    def build_geometry(self):
         coords = [
             [5.00, 7.40],
             [0.00, 10.00],
@@ -33,8 +35,7 @@ class PyraminxColorizer(BaseColorizer):
             [5.00, 9.13],
             [6.67, 6.25],
         ]
-        self.vertices = np.array(coords)
-        self.normalize_vertices()
+        return np.array(coords), {}
 
     def get_polygons(self) -> Dict[str, List[int]]:
         return {
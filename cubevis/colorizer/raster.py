@@ -0,0 +1,123 @@
+"""Rasterize colorizer drawings with NumPy, without an svg renderer.
+
+Every polygon is covered on a supersampled grid once per colorizer and size. Drawing a case
+then only paints the palette index of each polygon into the samples it covers, in svg order,
+and averages the colors of the samples of every pixel.
+"""
+import struct
+import zlib
+from math import ceil
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+# Same stroke as the svgs, in drawing units
+stroke_color = (0, 0, 0, 255)
+stroke_width = 0.5
+
+
+def parse_color(color: str) -> Tuple[int, int, int, int]:
+    """RGBA of a ``#rgb`` or ``#rrggbb`` color."""
+    color = color.lstrip("#")
+    if len(color) == 3:
+        color = "".join(c * 2 for c in color)
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16), 255
+
+
+def polygon_masks(points: np.ndarray, xs: np.ndarray, ys: np.ndarray, half_width: float):
+    """Fill and stroke coverage of one polygon at the sample points ``xs`` x ``ys``."""
+    px = xs[None, :]
+    py = ys[:, None]
+    inside = np.zeros((len(ys), len(xs)), dtype=bool)
+    distance = np.full((len(ys), len(xs)), np.inf)
+    for (x0, y0), (x1, y1) in zip(points, np.roll(points, -1, axis=0)):
+        if y0 != y1:
+            crosses = (y0 > py) != (y1 > py)
+            x_cross = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+            inside ^= crosses & (px < x_cross)
+        dx, dy = x1 - x0, y1 - y0
+        length = dx * dx + dy * dy
+        t = np.clip(((px - x0) * dx + (py - y0) * dy) / length, 0, 1) if length > 0 else 0
+        distance = np.minimum(distance, np.hypot(px - (x0 + t * dx), py - (y0 + t * dy)))
+    return inside, distance <= half_width
+
+
+class Rasterizer:
+    """Draws states of ``colorizer`` as RGBA arrays whose longest side is ``size`` pixels."""
+
+    def __init__(self, colorizer, size: int = 128, supersample: int = 4) -> None:
+        self.colorizer = colorizer
+        self.supersample = supersample
+        scale = size / max(colorizer.width, colorizer.height)
+        self.width = ceil(colorizer.width * scale)
+        self.height = ceil(colorizer.height * scale)
+        # Sample positions in drawing units, at the center of every subpixel
+        step = 1 / (scale * supersample)
+        xs = (np.arange(self.width * supersample) + 0.5) * step
+        ys = (np.arange(self.height * supersample) + 0.5) * step
+        # Flat indices of the samples covered by the fill and the stroke of every polygon
+        self.slots = []
+        for polygon_picking in colorizer.get_polygons().values():
+            points = colorizer.vertices[polygon_picking]
+            (left, top), (right, bottom) = points.min(axis=0) - stroke_width, points.max(axis=0) + stroke_width
+            left, right = np.searchsorted(xs, [left, right])
+            top, bottom = np.searchsorted(ys, [top, bottom])
+            masks = polygon_masks(points, xs[left:right], ys[top:bottom], stroke_width / 2)
+            self.slots.append(tuple(
+                ((top + rows) * len(xs) + left + columns).astype(np.int32)
+                for rows, columns in map(np.nonzero, masks)
+            ))
+        # Pixel of every sample
+        sample_rows = np.arange(len(ys)) // supersample
+        sample_columns = np.arange(len(xs)) // supersample
+        self.sample_pixels = (sample_rows[:, None] * self.width + sample_columns[None, :]).ravel()
+        self.colors = None
+
+    def render(self, state) -> np.ndarray:
+        colors = self.colorizer.sticker_color_indices(state.perm, state.ori)
+        return self.render_colors(colors.tolist())
+
+    def render_colors(self, colors: List[int]) -> np.ndarray:
+        if self.colors is None:
+            # Palette, then the stroke, then transparent
+            palette = [parse_color(color) for color in self.colorizer.compiled("sticker_table", self.colorizer.compile_sticker_colors)["palette"]]
+            self.colors = np.array(palette + [stroke_color, (0, 0, 0, 0)], dtype=np.float64)
+        stroke_label = len(self.colors) - 2
+        labels = np.full(len(self.sample_pixels), len(self.colors) - 1, dtype=np.int64)
+        for (fill, stroke), color in zip(self.slots, colors):
+            if color < 0:
+                continue
+            labels[fill] = color
+            labels[stroke] = stroke_label
+        counts = np.bincount(
+            self.sample_pixels * len(self.colors) + labels, minlength=self.width * self.height * len(self.colors)
+        ).reshape(self.height, self.width, len(self.colors))
+        # Average colors weighted by alpha, so transparent samples don't darken the edges
+        alpha = counts @ self.colors[:, 3]
+        rgb = (counts @ (self.colors[:, :3] * self.colors[:, 3:])) / np.maximum(alpha, 1)[..., None]
+        alpha /= self.supersample ** 2
+        return np.concatenate([rgb, alpha[..., None]], axis=-1).round().astype(np.uint8)
+
+
+def encode_png(pixels: np.ndarray) -> bytes:
+    """PNG file of an RGBA uint8 array."""
+    height, width, _ = pixels.shape
+    # Every row starts with filter type 0 (none)
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", header),
+        chunk(b"IDAT", zlib.compress(raw.tobytes(), 9)),
+        chunk(b"IEND", b""),
+    ])
+
+
+def write_png(path: Path, pixels: np.ndarray) -> None:
+    Path(path).write_bytes(encode_png(pixels))
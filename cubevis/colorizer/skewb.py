@@ -9,6 +9,8 @@ from cubevis.cube import Skewb
 class SkewbColorizer(BaseColorizer):
     def __init__(self, pre_moves="") -> None:
         super().__init__(Skewb(), pre_moves)
+
+    def build_geometry(self):
         coords = [
             [0, 0, 0],  # 0
             [1, 0, 0],  # 1
@@ -42,8 +44,7 @@ class SkewbColorizer(BaseColorizer):
         second_rotation = Rotation.from_rotvec([30, 0, 0], degrees=True).as_matrix()
         coords = coords @ first_rotation @ second_rotation
         coords = coords[:, [0, 2]]
-        self.vertices = coords
-        self.normalize_vertices()
+        return coords, {}
 
     def get_polygons(self) -> Dict[str, List[int]]:
         return {
@@ -9,6 +9,8 @@ from cubevis.cube import SquareOne
 class SquareOneColorizer(BaseColorizer):
     def __init__(self):
         super().__init__(SquareOne())
+
+    def build_geometry(self):
         points = [
             (0.00, 191.42),
             (0.00, 120.71),
@@ -59,13 +61,12 @@ class SquareOneColorizer(BaseColorizer):
             (130.71, 229.71),
             (60.71, 229.71),
         ]
-        self.vertices = np.array(points)
+        up_vert = np.array(points)
         down_vert = np.array(points)
         down_vert[:, 1] += 1.1 * (
-            np.max(self.vertices[:, 1]) - np.min(self.vertices[:, 1])
+            np.max(up_vert[:, 1]) - np.min(up_vert[:, 1])
         )
-        self.vertices = np.concatenate([self.vertices, down_vert])
-        self.normalize_vertices()
+        return np.concatenate([up_vert, down_vert]), {}
 
     def needs_invert(self):
         return True
@@ -78,18 +79,21 @@ class SquareOneColorizer(BaseColorizer):
             inverted = move[:-1] if move[-1] == "'" else move + "'"
             inverted_moves.append(inverted)
         scramble = " ".join(inverted_moves)
-        self.cube.reset()
-        self.cube.move(scramble)
+        self.cube.state = self.state_for(" ".join(moves), inverse=True)
         svg = self.create_svg()
         if path is not None:
             with open(path, "w") as file:
                 file.write(svg)
         return scramble
 
+    def state_for(self, alg, inverse=False, ref_rot_override=None):
+        if inverse:
+            return self.cube.state_after(alg, inverse=True)
+        return super().state_for(alg)
+
     def fix_last_move_to_cubeshape(self, alg: str) -> str:
         cube: SquareOne = self.cube
-        cube.scramble(alg)
-        cube_state = dict(cube.pieces)
+        cube_state = cube.pieces_of(cube.state_after(alg))
         move_parts = alg.split("/")
         u_test_piece = cube_state["X4"][0]
         d_test_piece = cube_state["X5"][0]
@@ -108,7 +112,6 @@ class SquareOneColorizer(BaseColorizer):
         if d == 2:
             d = -1
         move_parts[-1] = f" {u},{d}"
-        cube.reset()
         return "/".join(move_parts)
 
     def get_polygons(self):
@@ -9,6 +9,8 @@ from cubevis.cube import ThreeByThree
 class ThreeByThreeColorizer(BaseColorizer):
     def __init__(self, pre_moves="") -> None:
         super().__init__(ThreeByThree(), pre_moves)
+
+    def build_geometry(self):
         xy_to_key = {
             (0, 0): None,
             (1, 0): "BLU",
@@ -36,7 +38,7 @@ class ThreeByThreeColorizer(BaseColorizer):
             (3, 4): "FRU",
             (4, 4): None,
         }
-        self.polygons = {}
+        polygons = {}
         counter = 0
         coords = []
         for i in range(5 * 5):
@@ -62,11 +64,10 @@ class ThreeByThreeColorizer(BaseColorizer):
                 br = [x + 0.4, y - 0.1]
             coords += [tl, tr, br, bl]
             key = xy_to_key[(x, y)]
-            self.polygons[key] = [counter * 4 + j for j in range(4)]
-            # print(key, (x, y), self.polygons[key], [tl, tr, br, bl])
+            polygons[key] = [counter * 4 + j for j in range(4)]
+            # print(key, (x, y), polygons[key], [tl, tr, br, bl])
             counter += 1
-        self.vertices = np.array(coords)
-        self.normalize_vertices()
+        return np.array(coords), polygons
 
     def get_polygons(self) -> Dict[str, List[int]]:
         return self.polygons
@@ -133,6 +134,8 @@ class ThreeByThreeCMLLColorizer(ThreeByThreeLLColorizer):
 class ThreeByThreeZBLSColorizer(ThreeByThreeColorizer):
     def __init__(self):
         super().__init__("x2")
+
+    def build_geometry(self):
         points = [
             [0.00, 0.00],
             [0.00, -100.00],
@@ -172,9 +175,9 @@ class ThreeByThreeZBLSColorizer(ThreeByThreeColorizer):
             [-57.74, -33.33],
             [-28.87, -16.67],
         ]
-        self.vertices = np.array(points)
-        self.vertices[:, 0] *= -1
-        self.normalize_vertices()
+        vertices = np.array(points)
+        vertices[:, 0] *= -1
+        return vertices, {}
 
     def needs_invert(self):
         return True
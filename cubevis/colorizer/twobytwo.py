@@ -9,6 +9,8 @@ from cubevis.cube import TwoByTwo
 class TwoByTwoColorizer(BaseColorizer):
     def __init__(self, pre_moves="") -> None:
         super().__init__(TwoByTwo(), pre_moves)
+
+    def build_geometry(self):
         coords = [
             [0, 0],  # 0
             [1, 0],  # 1
@@ -52,8 +54,7 @@ class TwoByTwoColorizer(BaseColorizer):
             # [-0.25, 0.8], # 39
             # [-0.25, 0.2], # 40
         ]
-        self.vertices = np.array(coords)
-        self.normalize_vertices()
+        return np.array(coords), {}
 
     def get_polygons(self) -> Dict[str, List[int]]:
         return {
@@ -1,3 +1,5 @@
+from typing import List
+
 from cubevis.colorizer.colorizer import BaseColorizer
 from cubevis.colorizer.fivebyfive import *
 from cubevis.colorizer.fto import *
@@ -45,4 +47,23 @@ def get_colorizer(name) -> BaseColorizer:
     }
     if name not in options:
         raise KeyError(f"Puzzle must be one of {', '.join(options.keys())}")
-    return options[name]()
\ No newline at end of file
+    return options[name]()
+
+def variant_states(colorizers: List[BaseColorizer], alg: str, inverse: bool = True, ref_rot_override=None) -> list:
+    """The state every colorizer shows for ``alg``, computed once per group of colorizers that
+    share the cube definitions, pre and post moves and state logic. Variants such as 3x3, 3x3-LL
+    and 3x3-OLL or the FTO family only differ in colors, so they all get the same state object."""
+    states = {}
+    result = []
+    for colorizer in colorizers:
+        key = (colorizer.cube.mdefs, colorizer.pre_moves, colorizer.post_moves, type(colorizer).state_for)
+        if key not in states:
+            states[key] = colorizer.state_for(alg, inverse=inverse, ref_rot_override=ref_rot_override)
+        result.append(states[key])
+    return result
+
+
+def render_variants(colorizers: List[BaseColorizer], alg: str, inverse: bool = True, ref_rot_override=None) -> List[str]:
+    """Svgs of ``alg`` for every colorizer in ``colorizers``, see ``variant_states``."""
+    states = variant_states(colorizers, alg, inverse=inverse, ref_rot_override=ref_rot_override)
+    return [colorizer.render(state) for colorizer, state in zip(colorizers, states)]
@@ -1,26 +1,119 @@
 import re
 import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from math import gcd, lcm
+
+import numpy as np
+
+from cubevis.cube_cache import load_compiled, save_compiled
 
 
 def sign(num):
     return 1 if num >= 0 else -1
 
+
+def rotation_combinations(first_rotations, second_rotations):
+    """All rotations made of one of ``first_rotations`` followed by one of ``second_rotations``, in search order."""
+    return [(fr + sr).strip() for fr in first_rotations for sr in second_rotations]
+
+
+@lru_cache(maxsize=8192)
+def tokenize_alg(alg):
+    """Split an alg string into a tuple of (move name, signed move count) tokens, e.g. "R2' U" -> (("R", -2), ("U", 1))."""
+    tokens = []
+    for token in re.findall(r"[\d]?[A-z]+[\d']*", alg):
+        move_name = re.match(r"[\d]?[A-z]+", token).group(0)
+        move_count = 1
+        for num in re.findall(r"[\d]?[A-z]+([\d]+)", token.replace("'", "")):
+            move_count = int(num)
+        if token.count("'") % 2 == 1:
+            move_count *= -1
+        tokens.append((move_name, move_count))
+    return tuple(tokens)
+
+class CubeState:
+    """One puzzle state: the piece index at every location and its orientation, as two small arrays."""
+    __slots__ = ("perm", "ori")
+
+    def __init__(self, perm, ori) -> None:
+        self.perm = perm
+        self.ori = ori
+
+    def __iter__(self):
+        return iter((self.perm, self.ori))
+
+    def __eq__(self, other):
+        return isinstance(other, CubeState) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def copy(self):
+        return CubeState(self.perm.copy(), self.ori.copy())
+
+    def key(self):
+        return self.perm.tobytes() + self.ori.tobytes()
+
+
 class Cube:
+    # Maximum number of compiled algs kept in the shared LRU cache.
+    alg_cache_size = 4096
+    # Candidate rotations tried by to_reference_rotation, in order of preference.
+    reference_rotations = []
+    # Compiled tables never change after read_move_definitions, so every instance built from the
+    # same definitions shares them and only owns its CubeState.
+    shared_attributes = (
+        "piece_names", "piece_index", "moves", "move_perms", "move_oris", "move_powers", "max_cycles",
+        "ori_moduli", "twist_modulus", "solved_perm", "power_table", "stacked_powers", "compiled_algs", "reference_tables",
+        "alg_cache_lock",
+    )
+    shared_tables = {}
+
     def __init__(self, mdefs) -> None:
         self.mdefs = mdefs
-        self.pieces = {}
-        self.moves = {}
-        self.max_cycles = {}
-        self.read_move_definitions(mdefs)
+        shared = Cube.shared_tables.get(mdefs)
+        if shared is None:
+            self.compiled_algs = OrderedDict()
+            self.alg_cache_lock = threading.Lock()
+            self.reference_tables = {}
+            self.piece_names = []
+            self.piece_index = {}
+            self.moves = {}
+            self.move_perms = {}
+            self.move_oris = {}
+            self.move_powers = {}
+            self.max_cycles = {}
+            self.read_move_definitions(mdefs)
+            self.stacked_powers = self.stack_powers()
+            Cube.shared_tables[mdefs] = {name: getattr(self, name) for name in self.shared_attributes}
+        else:
+            for name, value in shared.items():
+                setattr(self, name, value)
+        self.reset()
     
     def getName(self):
         return "Cube"
 
+    def add_piece(self, piece_name):
+        if piece_name not in self.piece_index:
+            self.piece_index[piece_name] = len(self.piece_names)
+            self.piece_names.append(piece_name)
+        return self.piece_index[piece_name]
+
     def read_move_definition(self, move):
+        if move.strip() == "":
+            return
+        header = move.split()[0]
+        if not header.endswith(":") or len(header) < 2:
+            raise ValueError(f"Move definition \"{move.strip()}\" must start with \"<move name>:\" ({self.getName()})")
+        move_name = header[:-1]
+        if move_name in self.moves:
+            raise ValueError(f"Move {move_name} is defined more than once ({self.getName()})")
         cycles = re.findall(r'\([A-Za-z0-9+\- ]+\)', move)
-        move_name = move.split()[0][:-1]
         list_cycles = []
-        max_cycle_len = 0
+        seen = set()
         for cycle in cycles:
             pieces = cycle[1:-1].split()
             cylce_list = []
@@ -30,84 +123,296 @@ class Cube:
                 if str.isnumeric(piece[-1]) and len(piece) > 2 and "+" in piece or "-" in piece:
                     orientation_change = int(piece[-2:])
                     piece_name = piece[:-2]
+                if piece_name in seen:
+                    raise ValueError(f"Piece {piece_name} appears more than once in move {move_name} ({self.getName()})")
+                seen.add(piece_name)
                 cylce_list.append((piece_name, orientation_change))
-                self.pieces[piece_name] = (piece_name, 0)
-            max_cycle_len = max(len(cylce_list), max_cycle_len)
+                self.add_piece(piece_name)
             list_cycles.append(cylce_list)
-        self.max_cycles[move_name] = max_cycle_len
         self.moves[move_name] = list_cycles
 
+    def orientation_modulus(self, piece_name):
+        return max(1, len([c for c in piece_name if c.isalpha()]))
+
+    def move_order(self, move_name):
+        """Number of applications of a move until it returns to solved, from its cycle structure.
+
+        A cycle of length k whose twists add up to t brings every piece back after k turns with a
+        residual twist of t, so it needs k * m / gcd(t, m) turns for a piece with m orientations."""
+        order = 1
+        for cycle in self.moves[move_name]:
+            twist = sum(oc for _, oc in cycle)
+            cycle_order = len(cycle)
+            for piece_name, _ in cycle:
+                modulus = self.orientation_modulus(piece_name)
+                cycle_order = lcm(cycle_order, len(cycle) * modulus // gcd(twist % modulus, modulus))
+            order = lcm(order, cycle_order)
+        return order
+
+    def compile_moves(self):
+        """Turn the parsed cycles of every move into a source index array and an orientation delta array.
+
+        For a move ``m`` the piece at location ``j`` after the move is the piece that was at
+        ``move_perms[m][j]`` before it, twisted by ``move_oris[m][j]``."""
+        n = len(self.piece_names)
+        self.ori_moduli = np.array(
+            [self.orientation_modulus(p) for p in self.piece_names], dtype=np.int8
+        )
+        for move_name, cycles in self.moves.items():
+            perm = np.arange(n, dtype=np.intp)
+            oris = np.zeros(n, dtype=np.int8)
+            for cycle in cycles:
+                for i, (source, oc) in enumerate(cycle):
+                    dest = self.piece_index[cycle[(i + 1) % len(cycle)][0]]
+                    perm[dest] = self.piece_index[source]
+                    oris[dest] = oc
+            self.move_perms[move_name] = perm
+            self.move_oris[move_name] = oris
+
+    def compose(self, first, second):
+        """Compose two (source, twist) transforms into one that applies ``first`` and then ``second``."""
+        first_perm, first_ori = first
+        second_perm, second_ori = second
+        return (
+            first_perm[second_perm],
+            (first_ori[second_perm] + second_ori) % self.twist_modulus,
+        )
+
+    def invert_transform(self, transform):
+        """Return the exact inverse of a (source, twist) transform."""
+        perm, ori = transform
+        inverse_perm = np.empty_like(perm)
+        inverse_perm[perm] = np.arange(len(perm), dtype=perm.dtype)
+        return inverse_perm, (-ori[inverse_perm]) % self.twist_modulus
+
+    def build_power_tables(self):
+        """Precompose every power of every base move, so any move token is a single transform.
+
+        All powers live in one stacked table (``power_table``), in the order the disk cache stores
+        them; ``move_powers`` holds read-only views into it."""
+        n = len(self.piece_names)
+        identity = (np.arange(n, dtype=np.intp), np.zeros(n, dtype=np.int8))
+        perms, oris = [identity[0]], [identity[1]]
+        for move_name in self.moves.keys():
+            base = (self.move_perms[move_name], self.move_oris[move_name])
+            powers = [identity]
+            for _ in range(1, self.max_cycles[move_name]):
+                powers.append(self.compose(powers[-1], base))
+            perms += [perm for perm, _ in powers]
+            oris += [ori for _, ori in powers]
+        # Row 0 is an extra identity, so the table is never empty and padding can index it
+        self.power_table = (np.stack(perms), np.stack(oris))
+        for table in self.power_table:
+            table.flags.writeable = False
+        offset = 1
+        for move_name in self.moves.keys():
+            order = self.max_cycles[move_name]
+            self.move_powers[move_name] = [
+                (self.power_table[0][offset + k], self.power_table[1][offset + k]) for k in range(order)
+            ]
+            offset += order
+
+    def pieces_of(self, state):
+        """Dictionary view of ``state``, mapping location to (piece, orientation)."""
+        names = self.piece_names
+        return {
+            loc: (names[p], int(o))
+            for loc, p, o in zip(names, state.perm.tolist(), state.ori.tolist())
+        }
+
+    @property
+    def pieces(self):
+        """Dictionary view of the state, mapping location to (piece, orientation)."""
+        return self.pieces_of(self.state)
+
+    @pieces.setter
+    def pieces(self, pieces):
+        for loc, (piece, ori) in pieces.items():
+            self.perm[self.piece_index[loc]] = self.piece_index[piece]
+            self.ori[self.piece_index[loc]] = ori
+
+    @property
+    def perm(self):
+        return self.state.perm
+
+    @perm.setter
+    def perm(self, perm):
+        self.state.perm = perm
+
+    @property
+    def ori(self):
+        return self.state.ori
+
+    @ori.setter
+    def ori(self, ori):
+        self.state.ori = ori
+
+    def get_state(self):
+        return self.state.copy()
+
+    def set_state(self, state):
+        perm, ori = state
+        self.state = CubeState(perm.copy(), ori.copy())
+
+    def is_piece_solved(self, piece):
+        index = self.piece_index[piece]
+        return self.perm[index] == index and self.ori[index] == 0
+
     def is_solved(self):
-        for k, (p, o) in self.pieces.items():
-            if not (k == p and o == 0):
-                return False
-        return True
+        return bool(np.array_equal(self.perm, self.solved_perm) and not self.ori.any())
 
     def read_move_definitions(self, move_definitions):
-        mdefs = move_definitions.split("\n")
-        for mdef in mdefs:
-            self.read_move_definition(mdef)
-        
+        cached = load_compiled(self, move_definitions)
+        if not cached:
+            mdefs = move_definitions.split("\n")
+            for mdef in mdefs:
+                self.read_move_definition(mdef)
+            self.compile_moves()
+        self.twist_modulus = int(np.lcm.reduce(self.ori_moduli.astype(int))) if len(self.piece_names) > 0 else 1
+        self.solved_perm = np.arange(len(self.piece_names), dtype=np.int16)
+        if cached:
+            return
+
         for move in self.moves.keys():
-            cycles = 1
-            self.move(move)
-            while not self.is_solved():
-                self.move(move)
-                cycles += 1
-                if cycles > 12:
-                    print(f"Takes more than 12 cycles to go back to solved, likely an error in a move definition {move} {self.getName()}", file=sys.stderr)
-                    self.reset()
-                    break
-            self.max_cycles[move] = cycles
-
-    def to_reference_rotation(self, scramble=True, override_piece=None):
+            self.max_cycles[move] = self.move_order(move)
+            if self.max_cycles[move] > 12:
+                print(f"Takes more than 12 cycles to go back to solved, likely an error in a move definition {move} {self.getName()}", file=sys.stderr)
+        self.build_power_tables()
+        save_compiled(self, move_definitions)
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
         return ""
 
-    def move(self, m):
-        if m == "":
-            return
-        ms = re.findall(r"[\d]?[A-z]+[\d']*", m)
-        if len(ms) > 1:
-            for m_ in ms:
-                self.move(m_)
-            return
-        if m not in self.moves:
-            move_count = 1
-            for num in re.findall(r"[\d]?[A-z]+([\d]+)", m.replace("'", "")):
-                move_count = int(num)
-            for mod in re.findall(r"'", m):
-                move_count *= -1
-            move_name = re.search(r"[\d]?[A-z]+", m).group(0)
+    def reference_rotation_table(self, piece):
+        """Map each (location, orientation) of ``piece`` to the first of ``reference_rotations`` that solves it."""
+        table = self.reference_tables.get(piece)
+        if table is None:
+            home = self.piece_index[piece]
+            modulus = int(self.ori_moduli[home])
+            table = {}
+            for rotation in self.reference_rotations:
+                perm, ori = self.compile_alg(rotation)
+                table.setdefault((int(perm[home]), int(-ori[home]) % modulus), rotation)
+            self.reference_tables[piece] = table
+        return table
+
+    def find_reference_rotation(self, piece, default=None, state=None):
+        """Rotation that brings ``piece`` home with orientation 0 in ``state`` (the cube's own state by default)."""
+        if state is None:
+            state = self.state
+        home = self.piece_index[piece]
+        location = int(np.flatnonzero(state.perm == home)[0])
+        return self.reference_rotation_table(piece).get((location, int(state.ori[location])), default)
+
+    def solved_state(self):
+        return CubeState(self.solved_perm.copy(), np.zeros(len(self.piece_names), dtype=np.int8))
+
+    def transform_state(self, state, transform):
+        """New state after applying a (source, twist) transform to ``state``: one gather plus a modular add."""
+        source, twist = transform
+        perm = state.perm[source]
+        return CubeState(perm, (state.ori[source] + twist) % self.ori_moduli[perm])
+
+    def state_after(self, alg, inverse=False, state=None):
+        """State reached by applying ``alg`` (or its inverse) to ``state``, solved by default, leaving the cube untouched."""
+        if state is None:
+            state = self.solved_state()
+        return self.transform_state(state, self.compile_alg(alg, inverse))
+
+    def apply_transform(self, transform):
+        self.state = self.transform_state(self.state, transform)
+
+    def apply_move(self, move_name):
+        self.apply_transform((self.move_perms[move_name], self.move_oris[move_name]))
+
+    def normalized_tokens(self, alg):
+        """Resolve an alg to a tuple of (move name, power) pairs, dropping illegal moves and identity powers."""
+        tokens = []
+        for move_name, move_count in tokenize_alg(alg):
             if move_name not in self.max_cycles:
                 print(f"Illegal move \"{move_name}\", ignoring")
-                return
-            move_count = move_count % self.max_cycles[move_name]
+                continue
+            power = move_count % self.max_cycles[move_name]
+            if power != 0:
+                tokens.append((move_name, power))
+        return tuple(tokens)
 
-            for i in range(move_count):
-                self.move(move_name)
-            return
-        
-        if m not in self.max_cycles:
-            print(f"Illegal move \"{move_name}\", ignoring")
-            return
+    def compile_alg(self, alg, inverse=False):
+        """Compile a whole alg into a single (source, twist) transform, or its inverse.
 
-        cycles = self.moves[m]
-        for cycle in cycles:
-            sources = []
-            for piece, oc in cycle:
-                sources.append(piece)
-            destinations =  sources[1:] + [sources[0]]
-            tmp = []
-            for (source, oc) in cycle:
-                piece, ori = self.pieces[source]
-                ori = (ori + oc) % len([c for c in piece if c.isalpha()])
-                tmp += [(piece, ori)]
-            for dest, piece in zip(destinations, tmp):
-                self.pieces[dest] = piece
+        Results are kept in a bounded LRU cache keyed by the normalized alg, so applying a
+        previously seen alg costs O(pieces) regardless of its length."""
+        return self.compile_tokens(self.normalized_tokens(alg), inverse)
+
+    def compile_tokens(self, tokens, inverse=False):
+        key = (tokens, inverse)
+        # The cache is shared by every cube of this puzzle, which may live in different threads
+        with self.alg_cache_lock:
+            transform = self.compiled_algs.get(key)
+            if transform is not None:
+                self.compiled_algs.move_to_end(key)
+                return transform
+        if inverse:
+            transform = self.invert_transform(self.compile_tokens(tokens))
+        elif len(tokens) == 0:
+            n = len(self.piece_names)
+            transform = (np.arange(n, dtype=np.intp), np.zeros(n, dtype=np.int8))
+        else:
+            transform = self.move_powers[tokens[0][0]][tokens[0][1]]
+            for move_name, power in tokens[1:]:
+                transform = self.compose(transform, self.move_powers[move_name][power])
+        with self.alg_cache_lock:
+            self.compiled_algs[key] = transform
+            if len(self.compiled_algs) > self.alg_cache_size:
+                self.compiled_algs.popitem(last=False)
+        return transform
+
+    def apply_alg(self, alg, inverse=False):
+        self.apply_transform(self.compile_alg(alg, inverse))
+
+    def move(self, m):
+        self.apply_alg(m)
+
+    def stack_powers(self):
+        """Index of every move power in ``power_table`` (row 0 is the identity), for batched application.
+
+        The table is the array of the disk cache, so when it was loaded from there every process
+        working on the same definitions shares its memory-mapped pages."""
+        index = {}
+        offset = 1
+        for move_name in self.moves.keys():
+            for power in range(1, self.max_cycles[move_name]):
+                index[(move_name, power)] = offset + power
+            offset += self.max_cycles[move_name]
+        return index, self.power_table[0], self.power_table[1]
+
+    def apply_batch(self, algs):
+        """Scramble many algs from solved at once.
+
+        Returns ``(perms, oris)``, two ``(len(algs), n_pieces)`` arrays holding the state of every
+        alg. Tokens are grouped by position, so the whole batch costs one fancy-indexing step per
+        token position of the longest alg."""
+        index, table_perms, table_oris = self.stacked_powers
+        token_lists = [[index[token] for token in self.normalized_tokens(alg)] for alg in algs]
+        length = max((len(tokens) for tokens in token_lists), default=0)
+        steps = np.zeros((len(algs), length), dtype=np.intp)
+        for i, tokens in enumerate(token_lists):
+            steps[i, :len(tokens)] = tokens
+
+        n = len(self.piece_names)
+        offsets = (np.arange(len(algs), dtype=np.intp) * n)[:, None]
+        perms = np.broadcast_to(self.solved_perm, (len(algs), n)).copy()
+        oris = np.zeros((len(algs), n), dtype=np.int8)
+        for step in steps.T:
+            source = (table_perms[step] + offsets).ravel()
+            perms = perms.ravel()[source].reshape(len(algs), n)
+            # Twists are reduced by the common modulus here and by each piece's own modulus once at the end
+            oris = (oris.ravel()[source].reshape(len(algs), n) + table_oris[step]) % self.twist_modulus
+        oris %= self.ori_moduli[perms]
+        return perms, oris
 
     def reset(self):
-        for k in self.pieces.keys():
-            self.pieces[k] = (k, 0)
+        self.state = self.solved_state()
     
     def scramble(self, moves):
         self.reset()
@@ -120,7 +425,8 @@ class Cube:
     def pieces_to_cycles(self, name):
         visited = set()
         cycles = []
-        for k, v in self.pieces.items():
+        pieces = self.pieces
+        for k, v in pieces.items():
             if k in visited:
                 continue
             startKey = k
@@ -131,7 +437,7 @@ class Cube:
             while startKey != curV[0]:
                 curKey = curV[0]
                 visited.add(curKey)
-                curV = self.pieces[curKey]
+                curV = pieces[curKey]
                 cycle.append(curV)
             cycles.append(cycle)
         
@@ -193,17 +499,14 @@ z: (U R D L) (URF-1 DFR+1 DLF-1 UFL+1) (UBR+1 DRB-1 DBL+1 ULB-1)""")
     def getName(self):
         return "Skewb"
     
-    def to_reference_rotation(self, scramble=True, override_piece=None):
+    reference_rotations = rotation_combinations(
+        ["", "x ", "x2 ", "x' ", "z ", "z' "],
+        ["", "y", "y2", "y'"],
+    )
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
         solved_piece = "URF" if scramble else "DBL"
-        pieces_backup = {k: v for k, v in self.pieces.items()}
-        first_rotations = ["", "x ", "x2 ", "x' ", "z ", "z' "]
-        second_rotations = ["", "y", "y2", "y'"]
-        for fr in first_rotations:
-            for sr in second_rotations:
-                self.pieces = {k: v for k, v in pieces_backup.items()}
-                self.move(fr + sr)
-                if self.pieces[solved_piece] == (solved_piece, 0):
-                    return (fr + sr).strip()
+        return self.find_reference_rotation(solved_piece, state=state)
 
 
 
@@ -229,16 +532,13 @@ xl: (UR FC DI EG+1 BA+1) (UF FD DE+1 AE UA+1) (UL+1 LF LD LE LA+1) (UB+1 RF CD+1
     def getName(self):
         return "Megaminx"
     
-    def to_reference_rotation(self, scramble=True, override_piece=None):
-        pieces_backup = {k: v for k, v in self.pieces.items()}
-        first_rotations = ["", "x ", "x2 ", "x2' ", "x' ", "y ", "y' ", "y2' ", "xl2 ", "xl2 y ", "xl2 y2 "]
-        second_rotations = ["", "z", "z2", "z2'", "z'"]
-        for fr in first_rotations:
-            for sr in second_rotations:
-                self.pieces = {k: v for k, v in pieces_backup.items()}
-                self.move(fr + sr)
-                if self.pieces["FCD"] == ("FCD", 0):
-                    return (fr + sr).strip()
+    reference_rotations = rotation_combinations(
+        ["", "x ", "x2 ", "x2' ", "x' ", "y ", "y' ", "y2' ", "xl2 ", "xl2 y ", "xl2 y2 "],
+        ["", "z", "z2", "z2'", "z'"],
+    )
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
+        return self.find_reference_rotation("FCD", state=state)
         
 class TwoByTwo(Cube):
     def __init__(self) -> None:
@@ -256,16 +556,13 @@ z: (URF-1 DFR+1 DLF-1 UFL+1) (UBR+1 DRB-1 DBL+1 ULB-1)""")
     def getName(self):
         return "2x2"
     
-    def to_reference_rotation(self, scramble=True, override_piece=None):
-        pieces_backup = {k: v for k, v in self.pieces.items()}
-        first_rotations = ["", "x ", "x2 ", "x' ", "z ", "z' "]
-        second_rotations = ["", "y", "y2", "y'"]
-        for fr in first_rotations:
-            for sr in second_rotations:
-                self.pieces = {k: v for k, v in pieces_backup.items()}
-                self.move(fr + sr)
-                if self.pieces["DBL"] == ("DBL", 0):
-                    return (fr + sr).strip()
+    reference_rotations = rotation_combinations(
+        ["", "x ", "x2 ", "x' ", "z ", "z' "],
+        ["", "y", "y2", "y'"],
+    )
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
+        return self.find_reference_rotation("DBL", state=state)
     
 class ThreeByThree(Cube):
     def __init__(self) -> None:
@@ -297,16 +594,13 @@ z: (UF-1 FR-1 DF-1 FL-1) (URF-1 DFR+1 DLF-1 UFL+1) (UB-1 BR-1 DB-1 BL-1) (UBR+1
     def getName(self):
         return "3x3"
     
-    def to_reference_rotation(self, scramble=True, override_piece=None):
-        pieces_backup = {k: v for k, v in self.pieces.items()}
-        first_rotations = ["", "x ", "x2 ", "x' ", "z ", "z' "]
-        second_rotations = ["", "y", "y2", "y'"]
-        for fr in first_rotations:
-            for sr in second_rotations:
-                self.pieces = {k: v for k, v in pieces_backup.items()}
-                self.move(fr + sr)
-                if self.pieces["DBL"] == ("DBL", 0):
-                    return (fr + sr).strip()
+    reference_rotations = rotation_combinations(
+        ["", "x ", "x2 ", "x' ", "z ", "z' "],
+        ["", "y", "y2", "y'"],
+    )
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
+        return self.find_reference_rotation("DBL", state=state)
     
 class Pyraminx(Cube):
     def __init__(self) -> None:
@@ -332,19 +626,16 @@ z: (FDR+1 BFR-1 FBD) (fdr+1 bfr-1 fbd) (DF RF+1 FB+1) (BD+1 RD BR+1) (BRD-1) (br
     def getName(self):
         return "Pyraminx"
     
-    def to_reference_rotation(self, scramble=True, override_piece=None):
+    reference_rotations = rotation_combinations(
+        ["", "x ", "x' ", "xl "],
+        ["", "z", "z2"],
+    )
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
         piece = "FBD"
         if override_piece is not None:
             piece = override_piece
-        pieces_backup = {k: v for k, v in self.pieces.items()}
-        first_rotations = ["", "x ", "x' ", "xl "]
-        second_rotations = ["", "z", "z2"]
-        for fr in first_rotations:
-            for sr in second_rotations:
-                self.pieces = {k: v for k, v in pieces_backup.items()}
-                self.move(fr + sr)
-                if self.pieces[piece] == (piece, 0):
-                    return (fr + sr).strip()
+        return self.find_reference_rotation(piece, state=state)
             
 
 class FTO(Cube):
@@ -413,17 +704,13 @@ W: (WRGP+2 WBZR+2 WPOB) (R1 R2 P1) (B1 B2 P2)
 C: (P1 P2 R2)\
 """)
         
-    def to_reference_rotation(self, scramble=True, override_piece=None):
-        pieces_backup = {k: v for k, v in self.pieces.items()}
-        first_rotations = ["", "t xl ", "t' ", "t ", "xr ", "xr' t ", "xl ", "xr' "]
-        second_rotations = ["", "y", "y'"]
-        for fr in first_rotations:
-            for sr in second_rotations:
-                self.pieces = {k: v for k, v in pieces_backup.items()}
-                self.move(fr + sr)
-                if self.pieces["YZBO"] == ("YZBO", 0):
-                    return (fr + sr).strip()
-        return ""
+    reference_rotations = rotation_combinations(
+        ["", "t xl ", "t' ", "t ", "xr ", "xr' t ", "xl ", "xr' "],
+        ["", "y", "y'"],
+    )
+
+    def to_reference_rotation(self, scramble=True, override_piece=None, state=None):
+        return self.find_reference_rotation("YZBO", default="", state=state)
         
 """ equivalences
 {Y1 Y2 Y3}
@@ -562,9 +849,13 @@ W: (UFL DFR) (UL DR) (X1 X6) (ULB DRB) (UB DB) (X2 X7) (UBR DBL) (UR DL) (X3 X8)
                     part_moves.append(f"d{down}" if down <= 6 else f"d{12 - down}'")
                 transcoded.append(" ".join(part_moves))
             return " s ".join(transcoded).strip().replace("1", "")
+        return moves
 
-    def scramble(self, moves):
-        return super().scramble(self.to_self_notation(moves))
+    def compile_alg(self, alg, inverse=False):
+        return super().compile_alg(self.to_self_notation(alg), inverse)
+
+    def apply_batch(self, algs):
+        return super().apply_batch([self.to_self_notation(alg) for alg in algs])
 
     def getName(self):
         return "Square-1"
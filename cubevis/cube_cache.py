@@ -0,0 +1,99 @@
+"""On-disk cache of compiled puzzle definitions.
+
+Every ``Cube`` compiles its move definitions into permutation, orientation and
+move power tables. The compiled form is stored per definition (keyed by a hash of
+``mdefs``) so later constructions, including every worker process, only have to
+memory-map a few ``.npy`` files. The power tables stay memory-mapped (read-only)
+for the life of the process, so processes using the same definitions share
+their pages. Set ``CUBEVIS_CACHE_DIR`` to move the cache or
+``CUBEVIS_NO_CACHE=1`` to disable it.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Bump whenever the layout or the meaning of the cached arrays changes.
+CACHE_VERSION = 2
+
+
+def cache_root() -> Path:
+    if "CUBEVIS_CACHE_DIR" in os.environ:
+        return Path(os.environ["CUBEVIS_CACHE_DIR"])
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "cubevis"
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("CUBEVIS_NO_CACHE", "") in ("", "0")
+
+
+def definition_dir(mdefs: str) -> Path:
+    digest = hashlib.sha256(mdefs.encode("utf-8")).hexdigest()
+    return cache_root() / "definitions" / f"v{CACHE_VERSION}" / digest
+
+
+def save_compiled(cube, mdefs: str) -> None:
+    """Write the compiled tables of ``cube`` to the cache, ignoring any I/O error."""
+    if not cache_enabled():
+        return
+    target = definition_dir(mdefs)
+    if target.is_dir():
+        return
+    move_names = list(cube.moves.keys())
+    meta = {
+        "version": CACHE_VERSION,
+        "pieces": cube.piece_names,
+        "moves": {name: cube.moves[name] for name in move_names},
+        "orders": [cube.max_cycles[name] for name in move_names],
+    }
+    perms, oris = cube.power_table
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=target.name + ".", dir=target.parent))
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        np.save(tmp / "perms.npy", perms)
+        np.save(tmp / "oris.npy", oris)
+        np.save(tmp / "moduli.npy", cube.ori_moduli)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another process finished first, its copy is identical.
+            shutil.rmtree(tmp, ignore_errors=True)
+    except OSError:
+        pass
+
+
+def load_compiled(cube, mdefs: str) -> bool:
+    """Fill ``cube`` with the cached tables for ``mdefs``. Returns ``False`` on a cache miss."""
+    if not cache_enabled():
+        return False
+    source = definition_dir(mdefs)
+    try:
+        meta = json.loads((source / "meta.json").read_text(encoding="utf-8"))
+        perms = np.load(source / "perms.npy", mmap_mode="r")
+        oris = np.load(source / "oris.npy", mmap_mode="r")
+        moduli = np.load(source / "moduli.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return False
+    if meta.get("version") != CACHE_VERSION or perms.shape != oris.shape:
+        return False
+
+    cube.piece_names = meta["pieces"]
+    cube.piece_index = {name: i for i, name in enumerate(cube.piece_names)}
+    cube.ori_moduli = moduli
+    # Kept memory-mapped: move_powers and the batch table are views into the shared pages
+    cube.power_table = (perms, oris)
+    offset = 1
+    for (move_name, cycles), order in zip(meta["moves"].items(), meta["orders"]):
+        cube.moves[move_name] = [[tuple(piece) for piece in cycle] for cycle in cycles]
+        cube.max_cycles[move_name] = order
+        cube.move_powers[move_name] = [(perms[offset + k], oris[offset + k]) for k in range(order)]
+        cube.move_perms[move_name], cube.move_oris[move_name] = cube.move_powers[move_name][1 % order]
+        offset += order
+    return True
@@ -0,0 +1,147 @@
+"""Canonical state fingerprints under a colorizer's equivalences.
+
+The batch solver treats pieces listed in an equivalence set (``{UR UL UF UB}``) as
+indistinguishable and reduces the orientation of pieces listed in a unique
+orientations line (``1: URF UFL``) modulo the given number. Applying the same masks
+to a compiled :class:`~cubevis.cube.Cube` state gives a hashable key that is equal
+for exactly the setups the solver considers the same state, so duplicates can be
+found before any Node process is spawned.
+
+Pre and post adjusts (``U`` for last layer sets) make the solver merge every setup
+``post S pre`` with ``S``. Instead of listing that whole orbit for each state like the
+solver does, every state is mapped to the smallest key in its adjust orbit, so the
+merged cases share one key.
+"""
+import itertools
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from cubevis.cube import Cube
+
+
+def parse_equivalences(equivalences: str) -> Tuple[List[List[str]], Dict[str, int]]:
+    """Parse the "Unique Orientations & Equivalences" syntax into equivalence sets and orientation counts."""
+    sets = []
+    for part in equivalences.split("{")[1:]:
+        if "}" not in part:
+            raise ValueError('Missing "}" in Unique Orientations and Equivalences')
+        pieces = part.split("}")[0].split()
+        if len(pieces) > 0:
+            sets.append(pieces)
+
+    orientations = {}
+    for line in equivalences.split("\n"):
+        if ":" not in line:
+            continue
+        header, pieces = line.split(":", 1)
+        try:
+            num_ori = int(header.strip())
+        except ValueError:
+            raise ValueError(f'"{header}:" is not a valid Unique Orientations header.')
+        if num_ori <= 0:
+            raise ValueError(f'"{header}:" is invalid because the number of orientations must be positive.')
+        for piece in pieces.replace("{", " ").replace("}", " ").split():
+            orientations[piece] = num_ori
+    return sets, orientations
+
+
+class Fingerprinter:
+    """Maps cube states to canonical keys, masking pieces and orientations the way the batch solver does."""
+
+    def __init__(self, cube: Cube, equivalences: str = "") -> None:
+        self.cube = cube
+        n = len(cube.piece_names)
+        sets, orientations = parse_equivalences(equivalences)
+        # The solver counts orientations by capital letters only, so lowercase pieces have one orientation
+        solver_ori = np.array(
+            [max(1, len([c for c in p if c.isupper()])) for p in cube.piece_names], dtype=np.int8
+        )
+
+        self.representative = np.arange(n, dtype=np.int16)
+        for pieces in sets:
+            first = self.piece(pieces[0])
+            for piece in pieces[1:]:
+                index = self.piece(piece)
+                if solver_ori[index] != solver_ori[first]:
+                    raise ValueError(
+                        f'"{piece}" and "{pieces[0]}" cannot be in the same equivalence set because they are different types of pieces.'
+                    )
+                self.representative[index] = first
+
+        self.ori_modulus = solver_ori.copy()
+        for piece, num_ori in orientations.items():
+            index = self.piece(piece)
+            if solver_ori[index] % num_ori != 0:
+                raise ValueError(
+                    f"Cannot set number of orientations of piece {piece} to {num_ori} because {num_ori} is not divisible by {solver_ori[index]}."
+                )
+            self.ori_modulus[index] = num_ori
+
+        self.solved_key = self.key(cube.solved_perm, np.zeros(n, dtype=np.int8))
+
+    def piece(self, name: str) -> int:
+        if name not in self.cube.piece_index:
+            raise ValueError(f'"{name}" is not a piece. (error in Unique Orientations & Equivalences)')
+        return self.cube.piece_index[name]
+
+    def keys(self, perms: np.ndarray, oris: np.ndarray) -> List[bytes]:
+        """Keys for a batch of states given as ``(n_states, n_pieces)`` arrays."""
+        classes = self.representative[perms]
+        masked_oris = (oris % self.ori_modulus[classes]).astype(np.int16)
+        masked = np.concatenate([classes, masked_oris], axis=-1)
+        return [row.tobytes() for row in masked]
+
+    def key(self, perm: np.ndarray, ori: np.ndarray) -> bytes:
+        return self.keys(perm[None], ori[None])[0]
+
+    def adjust_transforms(self, adjust: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Every transform the solver tries for an adjust string such as ``"U"`` or ``"<U, D>"``."""
+        powers = []
+        for move_name in re.sub(r"[()\[\]{}<>]", "", adjust).replace(",", " ").split():
+            if move_name not in self.cube.move_powers:
+                raise ValueError(f'"{move_name}" is not a valid move in adjust "{adjust}".')
+            powers.append(self.cube.move_powers[move_name])
+        transforms = {}
+        for combination in itertools.product(*powers):
+            transform = self.cube.compile_tokens(())
+            for power in combination:
+                transform = self.cube.compose(transform, power)
+            transforms.setdefault(transform[0].tobytes() + transform[1].tobytes(), transform)
+        return list(transforms.values())
+
+    def canonical_keys(self, perms: np.ndarray, oris: np.ndarray, pre_adjust: str = "", post_adjust: str = "") -> List[bytes]:
+        """Smallest key of every state ``post S pre`` for each state ``S`` of the batch."""
+        pre = self.adjust_transforms(pre_adjust)
+        post = self.adjust_transforms(post_adjust)
+        canonical = None
+        for post_perm, post_ori in post:
+            # Post adjusts are applied before the setup, pre adjusts after it
+            adjusted_perms = post_perm[perms]
+            adjusted_oris = post_ori[perms].astype(np.int16) + oris
+            for pre_perm, pre_ori in pre:
+                candidate_perms = adjusted_perms[:, pre_perm]
+                candidate_oris = (adjusted_oris[:, pre_perm] + pre_ori) % self.cube.ori_moduli[candidate_perms]
+                keys = self.keys(candidate_perms, candidate_oris)
+                canonical = keys if canonical is None else [min(a, b) for a, b in zip(canonical, keys)]
+        return canonical
+
+    def fingerprint_algs(self, algs: List[str], pre_adjust: str = "", post_adjust: str = "") -> List[bytes]:
+        """Keys of the states reached by scrambling each alg from solved, reduced over the adjust orbit if given."""
+        if len(algs) == 0:
+            return []
+        if pre_adjust == "" and post_adjust == "":
+            return self.keys(*self.cube.apply_batch(algs))
+        return self.canonical_keys(*self.cube.apply_batch(algs), pre_adjust, post_adjust)
+
+
+def find_duplicates(keys: List[bytes]) -> List[Tuple[int, int]]:
+    """Return ``(index, first_index)`` for every key that already occurred at ``first_index``."""
+    first_seen: Dict[bytes, int] = {}
+    duplicates = []
+    for i, key in enumerate(keys):
+        first = first_seen.setdefault(key, i)
+        if first != i:
+            duplicates.append((i, first))
+    return duplicates
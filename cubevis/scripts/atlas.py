@@ -0,0 +1,52 @@
+"""Sprite atlases: all case images of an algset rasterized into one PNG.
+
+``atlas.json`` maps every case id to the ``[x, y, width, height]`` of its tile in ``atlas.png``.
+Cases that look the same share a tile.
+"""
+import json
+from math import ceil, sqrt
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from cubevis.colorizer.raster import Rasterizer, write_png
+
+
+class SpriteAtlas:
+    def __init__(self, colorizer, size: int = 128) -> None:
+        self.colorizer = colorizer
+        self.rasterizer = Rasterizer(colorizer, size)
+        self.tiles: List[np.ndarray] = []
+        self.tile_indices: Dict[bytes, int] = {}
+        self.cases: Dict[str, int] = {}
+
+    def add(self, case_id, state) -> None:
+        colors = self.colorizer.sticker_color_indices(state.perm, state.ori)
+        key = colors.tobytes()
+        index = self.tile_indices.get(key)
+        if index is None:
+            index = len(self.tiles)
+            self.tile_indices[key] = index
+            self.tiles.append(self.rasterizer.render_colors(colors.tolist()))
+        self.cases[str(case_id)] = index
+
+    def pack(self):
+        """The atlas image, tiles in a roughly square grid, and the offsets of every case."""
+        width, height = self.rasterizer.width, self.rasterizer.height
+        columns = max(1, ceil(sqrt(len(self.tiles) * height / width)))
+        rows = max(1, ceil(len(self.tiles) / columns))
+        image = np.zeros((rows * height, columns * width, 4), dtype=np.uint8)
+        positions = []
+        for i, tile in enumerate(self.tiles):
+            y, x = divmod(i, columns)
+            image[y * height:(y + 1) * height, x * width:(x + 1) * width] = tile
+            positions.append([x * width, y * height, width, height])
+        offsets = {case_id: positions[index] for case_id, index in self.cases.items()}
+        return image, offsets
+
+    def write(self, png_path: Path, json_path: Path) -> None:
+        image, offsets = self.pack()
+        write_png(png_path, image)
+        with open(json_path, "w") as file:
+            json.dump(offsets, file)
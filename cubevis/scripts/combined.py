@@ -0,0 +1,92 @@
+"""Reading and writing ``combined.json``, the case images shipped to the trainers.
+
+The legacy format maps every case id to its full svg. The deduped format stores
+every distinct svg once, keyed by a hash of its content, and maps case ids to
+those hashes:
+
+    {"format": "deduped", "svgs": {"<hash>": "<svg ...>"}, "cases": {"1": "<hash>"}}
+
+The compact format ships the colorizer geometry once (see
+``BaseColorizer.svg_geometry``) and one palette index character per sticker for
+every case. Trainers draw it with the ``combined.js`` renderer:
+
+    {"format": "compact", "geometry": {...}, "cases": {"1": "0012.3..."}}
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+COMBINED_FORMATS = ("legacy", "deduped", "compact")
+
+
+def svg_digest(svg: str) -> str:
+    return hashlib.sha256(svg.encode("utf-8")).hexdigest()[:16]
+
+
+class CombinedWriter:
+    """Streams ``combined.json`` to ``path`` while cases are added, as the text ``json.dump`` writes
+    for the whole object. Only the digests of the distinct svgs and, for the deduped format, the case
+    to digest mapping stay in memory."""
+
+    def __init__(self, path: Path, combined_format: str = "legacy", geometry: Optional[dict] = None) -> None:
+        if combined_format not in COMBINED_FORMATS:
+            raise ValueError(f"combined.json format must be one of {', '.join(COMBINED_FORMATS)}, not {combined_format}")
+        if combined_format == "compact" and geometry is None:
+            raise ValueError("The compact format needs the colorizer geometry")
+        self.combined_format = combined_format
+        self.written_digests = set()
+        self.cases: Dict[str, str] = {}
+        self.count = 0
+        self.path = Path(path)
+        self.file = open(path, "w")
+        if combined_format == "deduped":
+            self.file.write('{"format": "deduped", "svgs": {')
+        elif combined_format == "compact":
+            self.file.write('{"format": "compact", "geometry": ' + json.dumps(geometry) + ', "cases": {')
+        else:
+            self.file.write("{")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def entry(self, key: str, value: str) -> None:
+        self.file.write((", " if self.count else "") + json.dumps(key) + ": " + json.dumps(value))
+        self.count += 1
+
+    def add(self, case_id, svg: str, color_string: Optional[str] = None) -> None:
+        if self.combined_format == "legacy":
+            self.entry(str(case_id), svg)
+        elif self.combined_format == "compact":
+            if color_string is None:
+                raise ValueError("The compact format needs a color string for every case")
+            self.entry(str(case_id), color_string)
+        else:
+            digest = svg_digest(svg)
+            if digest not in self.written_digests:
+                self.written_digests.add(digest)
+                self.entry(digest, svg)
+            self.cases[str(case_id)] = digest
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        if self.combined_format == "deduped":
+            self.file.write('}, "cases": ' + json.dumps(self.cases) + "}")
+        elif self.combined_format == "compact":
+            self.file.write("}}")
+        else:
+            self.file.write("}")
+        self.file.close()
+
+    def abort(self) -> None:
+        """Delete the partly written file instead of leaving a truncated combined.json."""
+        if not self.file.closed:
+            self.file.close()
+        self.path.unlink(missing_ok=True)
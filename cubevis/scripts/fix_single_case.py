@@ -1,37 +1,65 @@
 import typer
 from pathlib import Path
+from cubevis.colorizer import get_colorizer
 from cubevis.scripts.images import gen_images
+from cubevis.solver.solver import BatchInput, SolverSession, SubgroupSpec
 app = typer.Typer()
 
+def solve_cases(puzzle: str, setups: list[str], node_path: Path) -> list[list[str]]:
+    """Solve every setup on its own with the colorizer's solver settings, sharing one solver server."""
+    colorizer = get_colorizer(puzzle)
+    subgroups = []
+    for row in colorizer.get_prune_search_subgroup().splitlines():
+        prune, search = row.split()[:2]
+        subgroups.append(SubgroupSpec(" ".join(row.split()[2:]), prune, search))
+    inp = BatchInput(
+        puzzle=colorizer.get_definitions(),
+        ignore=colorizer.get_equivalences(),
+        solve="",
+        preAdjust=colorizer.get_pre_adjust(),
+        postAdjust=colorizer.get_post_adjust(),
+        subgroups=subgroups,
+    )
+    with SolverSession(node_path=node_path) as session:
+        return session.solve_cases(inp, setups)
+
 @app.command()
-def fix_specific_cases(puzzle: str, algs_csv: Path, gen_out: Path, scrambles: Path, cases: list[str]):
+def fix_specific_cases(
+        puzzle: str, algs_csv: Path, gen_out: Path, scrambles: Path, cases: list[str],
+        solve: bool = typer.Option(False, "--solve", help="Solve the cases here instead of reading the batch solver output from an excel file."),
+        node_path: Path = Path("node"),
+    ):
     import polars as pl
     gen_images(puzzle, algs_csv, gen_out)
     algs = pl.read_csv(algs_csv)
     algs = algs.with_columns(bsid=pl.row_index() + 1).filter(pl.col("Name").is_in(cases))
     bs_lines = (gen_out / "_batch_solver_input.txt").read_text().splitlines()
-    new_batch_solver_input = ["["]
-    for bsid in algs['bsid']:
-        new_batch_solver_input.append(bs_lines[bsid])
-    new_batch_solver_input.append("]")
-    print("\n".join(new_batch_solver_input))
-    new_scrambles = None
-    while True:
-        path_to_partial_scrambles = input("Path to batch solver outpt excel (q to quit): ")
-        if path_to_partial_scrambles.lower() == 'q':
-            exit(0)
-        try:
-            new_scrambles = pl.read_excel(path_to_partial_scrambles)
-            break
-        except Exception as e:
-            print("Failed to read excel {e}")
-    assert new_scrambles is not None
+    if solve:
+        new_solutions = solve_cases(puzzle, [bs_lines[bsid].rstrip(",") for bsid in algs['bsid']], node_path)
+    else:
+        new_batch_solver_input = ["["]
+        for bsid in algs['bsid']:
+            new_batch_solver_input.append(bs_lines[bsid])
+        new_batch_solver_input.append("]")
+        print("\n".join(new_batch_solver_input))
+        new_scrambles = None
+        while True:
+            path_to_partial_scrambles = input("Path to batch solver outpt excel (q to quit): ")
+            if path_to_partial_scrambles.lower() == 'q':
+                exit(0)
+            try:
+                new_scrambles = pl.read_excel(path_to_partial_scrambles)
+                break
+            except Exception as e:
+                print("Failed to read excel {e}")
+        assert new_scrambles is not None
+        new_solutions = [list(new_scrambles[column]) for column in new_scrambles.columns[1::2]]
     scrambles_df = pl.read_excel(scrambles)
-    for bsid, new_scramble_col in zip(algs['bsid'], new_scrambles.columns[1::2]):
+    for bsid, solutions in zip(algs['bsid'], new_solutions):
         old_scramble_col = scrambles_df.columns[(bsid - 1) * 2 + 1]
         print(scrambles_df[old_scramble_col][0], bsid - 1)
         old_scrambles_len = len(scrambles_df[old_scramble_col])
-        new_scramble = pl.Series(old_scramble_col, ([scramble for scramble in new_scrambles[new_scramble_col]] + [""] * old_scrambles_len)[:old_scrambles_len])
+        new_scramble = pl.Series(old_scramble_col, (solutions + [""] * old_scrambles_len)[:old_scrambles_len])
         print(new_scramble[0])
         scrambles_df = scrambles_df.with_columns(pl.lit(new_scramble).alias(old_scramble_col))
     scrambles_df.write_excel(scrambles.with_suffix('.new.xlsx'))
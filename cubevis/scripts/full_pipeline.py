@@ -10,7 +10,9 @@ from rich.prompt import Prompt, IntPrompt, InvalidResponse
 from cubevis.scripts.jsons import gen_jsons
 from cubevis.scripts.images import gen_images, make_batch_solver_string
 from cubevis.colorizer import get_colorizer
-from cubevis.solver.solver import run_batch, BatchInput, SubgroupSpec, SortingSpec
+from cubevis.colorizer.colorizer import optimized_svg_style
+from cubevis.solver.solver import run_batch, BatchInput, SolverSession, SubgroupSpec, SortingSpec
+from cubevis.solver.scheduler import run_batch_scheduled
 from pathlib import Path
 
 
@@ -49,6 +51,11 @@ def full_pipeline(
         override_adjust: str | None = None,
         override_preadjust: str | None = None,
         override_postadjust: str | None = None,
+        combined_format: str = "legacy",
+        optimize_svg: bool = False,
+        output_mode: str = "files",
+        solver_workers: int = 1,
+        solver_threads: int = 1,
     ):
     console = Console()
     puzzle = "-".join(colorizer_name.split("-")[:-1])
@@ -86,17 +93,19 @@ def full_pipeline(
         preadjust = override_preadjust
     if override_postadjust is not None:
         postadjust = override_postadjust
-    output = gen_images(colorizer_name, csv_file, pictures_root)
+    output = gen_images(
+        colorizer_name, csv_file, pictures_root, pre_adjust=preadjust, post_adjust=postadjust, combined_format=combined_format,
+        optimize_svg=optimize_svg, output_mode=output_mode,
+    )
     batch_solver_scrambles = output['setups']
-    num_cases = len(output['df'])
+    num_cases = len(output['df']) - len(output['duplicates']) - len(output['solved'])
     def on_message(msg):
         mtype = msg.get("type")
         mval = msg.get("value")
         if mtype == "num-states":
             assert type(mval) == int
             if num_cases != mval:
-                logging.root.warning("Number of states reported by batch solver doesn't match number of cases in algs csv file.")
-                # TODO: implement finding the duplicates
+                logging.root.warning("Number of states reported by batch solver doesn't match number of distinct cases in algs csv file.")
     
     result = None
     if json_file.is_file():
@@ -127,18 +136,12 @@ def full_pipeline(
                 postAdjust=postadjust,
                 subgroups=subgroups,
             )
-            def on_message_missing(msg):
-                mtype = msg.get("type")
-                mval = msg.get("value")
-                if mtype == "num-states":
-                    assert type(mval) == int
-                    if len(missing_scrambles) != mval:
-                        logging.root.warning("Number of states reported by batch solver doesn't match number of cases in algs csv file.")
-                        # TODO: implement finding the duplicates
-            result = run_batch(inp, node_path=node_path, on_message=on_message_missing).to_dict()
-            assert len(missing_scrambles_indexes) == len(result['cases']), "something went wrong and the number of solutions is not equal to the number of missing scrambles"
-            for index, case in zip(missing_scrambles_indexes, result['cases']):
-                scrambles['cases'][index]['solutions'] = case['solutions']
+            # One request per case on a warm solver server: the pruning tables are built once and
+            # every missing case gets its own answer, duplicates included
+            with SolverSession(node_path=node_path) as session:
+                missing_solutions = session.solve_cases(inp, missing_scrambles)
+            for index, solutions in zip(missing_scrambles_indexes, missing_solutions):
+                scrambles['cases'][index]['solutions'] = solutions
             result = scrambles
 
     if result is None:
@@ -156,7 +159,7 @@ def full_pipeline(
 [purple]{inp.subgroups}
 {inp.preAdjust}
 {inp.postAdjust}""", title="Starting scramble generation with settings"))
-        result = run_batch(inp, node_path=node_path, on_message=on_message).to_dict()
+        result = solve_batch(inp, node_path, on_message, solver_workers, solver_threads).to_dict()
 
 
     for case in result['cases']:
@@ -183,10 +186,49 @@ def full_pipeline(
         for file in relevant_files:
             print(f"Copying {file}")
             shutil.copy(data_root / file, alg_trainer_path / file)
+        if combined_format != "legacy" or optimize_svg:
+            write_combined_loader(alg_trainer_path, puzzle, algset)
+            if add_combined_loader_script(alg_trainer_path / "index.html"):
+                console.print("[yellow]Added combined.js to index.html, which was generated before it existed.")
+        if combined_format != "legacy":
+            console.print(f"[yellow]combined.json is in the {combined_format} format, the trainer has to load it with loadCombined() from combined.js.")
     if not alg_trainer_path.is_dir():
         console.print(f"[red]Alg trainer {alg_trainer_path.as_posix()} not a directory, creating new alg trainer directory, copying relevant files.")
         create_new_trainer(trainer_path=alg_trainer_path, data_root=data_root, relevant_files=relevant_files, puzzle=puzzle, algset=algset)
     
+def solve_batch(inp: BatchInput, node_path: Path, on_message, workers: int, threads: int = 1):
+    """Solve in one Node process with ``threads`` threads sharing the pruning tables, or schedule
+    the cases over ``workers`` processes (each single threaded)."""
+    if workers > 1:
+        return run_batch_scheduled(inp, workers=workers, node_path=node_path, on_message=on_message)
+    return run_batch(inp, node_path=node_path, on_message=on_message, threads=threads)
+
+def write_combined_loader(trainer_path: Path, puzzle: str, algset: str):
+    """Write combined.js, which lets the trainer read every combined.json format and styles optimized svgs."""
+    env = Environment(
+        loader=PackageLoader("cubevis.scripts"),
+        autoescape=select_autoescape()
+    )
+    loader = env.get_template("combined.js.jinja").render(puzzle=puzzle, algset=algset, svg_style=optimized_svg_style)
+    (trainer_path / "combined.js").write_text(loader)
+
+def add_combined_loader_script(index_path: Path) -> bool:
+    """Load combined.js in an index.html generated before it existed. Returns whether it was added."""
+    if not index_path.is_file():
+        return False
+    html = index_path.read_text(encoding="utf-8")
+    if 'src="combined.js"' in html:
+        return False
+    tag = '<script src="combined.js"></script>\n\t'
+    # Before the trainer code, which may already use it while loading
+    anchor = html.find('<script src="../src/')
+    if anchor < 0:
+        anchor = html.find("</head>")
+    if anchor < 0:
+        return False
+    index_path.write_text(html[:anchor] + tag + html[anchor:], encoding="utf-8")
+    return True
+
 def create_new_trainer(trainer_path: Path, data_root: Path, relevant_files: list[str], puzzle: str, algset: str):
     env = Environment(
         loader=PackageLoader("cubevis.scripts"),
@@ -222,6 +264,7 @@ def create_new_trainer(trainer_path: Path, data_root: Path, relevant_files: list
     index = env.get_template("index.html.jinja").render(**template_keys)
     trainer_path.mkdir()
     (trainer_path / "algsinfo.js").write_text(algsinfo)
+    write_combined_loader(trainer_path, puzzle, algset)
     (trainer_path / "index.html").write_text(index)
     for file in relevant_files:
         shutil.copy(data_root / file, trainer_path / file)
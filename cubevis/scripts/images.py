@@ -1,14 +1,17 @@
 import argparse
-from cubevis.colorizer import get_colorizer
+from cubevis.colorizer import get_colorizer, variant_states
 from cubevis.colorizer import FTOColorizer, ThreeByThreeZBLSColorizer, BaseColorizer, SquareOneColorizer
 from cubevis.cube import FTORotations, SquareOne
-from typing import List
-import json
+from cubevis.fingerprint import Fingerprinter, find_duplicates
+from cubevis.scripts.atlas import SpriteAtlas
+from cubevis.scripts.combined import COMBINED_FORMATS, CombinedWriter
+from cubevis.scripts.output import OUTPUT_MODES, open_image_output
+from contextlib import ExitStack
+from typing import List, Optional
 import os
 import polars as pl
 from pathlib import Path
 import re
-import numpy as np
 
 def clean_alg(alg: str, puzzle):
     sq1_alg = re.match(r"\[[ A-Z]+\](/? [-?\d,-?\d /]+ -?\d,-?\d( /)?)", alg)
@@ -121,41 +124,93 @@ def clean_alg_pyraminx(alg: str):
     return alg
 
 
-def gen_images(colorizer_name: str, input_path: Path, output_path: Path, filter: List[str] = []):
+def gen_images(
+    colorizer_name: str,
+    input_path: Path,
+    output_path: Path,
+    filter: List[str] = [],
+    pre_adjust: Optional[str] = None,
+    post_adjust: Optional[str] = None,
+    combined_format: str = "legacy",
+    variants: List[str] = [],
+    optimize_svg: bool = False,
+    atlas_size: Optional[int] = None,
+    output_mode: str = "files",
+):
+    if combined_format not in COMBINED_FORMATS:
+        raise ValueError(f"combined_format must be one of {', '.join(COMBINED_FORMATS)}")
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"output_mode must be one of {', '.join(OUTPUT_MODES)}")
     puzzle: BaseColorizer = get_colorizer(colorizer_name)
+    if pre_adjust is None:
+        pre_adjust = puzzle.get_pre_adjust()
+    if post_adjust is None:
+        post_adjust = puzzle.get_post_adjust()
     os.makedirs(output_path, exist_ok=True)
     batch_solver_inputs = []
     df = (pl.read_csv(input_path, infer_schema_length=1000).filter(pl.col('Algs').is_not_null(), pl.col('Algs') != ""))
     case_id = 1 
-    svg_strings = dict()
-    for i, row in enumerate(df.filter(pl.col("Algs").is_not_null(), (pl.col("Algs") != "")).iter_rows(named=True)):
-        if len(filter) > 0 and row["Algset"] not in filter:
-            continue
-        filename =  output_path / f"{case_id}.svg"
-        alg = row['Algs'].split("\n")[0]
-        if "Pyraminx" in colorizer_name:
-            alg = clean_alg_pyraminx(alg)
-        alg = clean_alg(alg, puzzle.cube)
-        if "Skewb" in colorizer_name:
-            alg = clean_alg([alg for alg in row["Algs"].split("\n") if "H" not in alg and "S" not in alg][0], puzzle.cube)
-        if "FTO" in colorizer_name:
-            alg = clean_alg_fto(alg)
+    # Color strings only exist for palettes of up to 62 colors, so only compute them when used
+    compact = combined_format == "compact"
+    # An exception in between closes every output unfinished, instead of leaving truncated files
+    with ExitStack() as outputs:
+        images = outputs.enter_context(open_image_output(output_path, output_mode))
+        svg_strings = outputs.enter_context(
+            CombinedWriter(output_path.parent / "combined.json", combined_format, puzzle.svg_geometry() if compact else None)
+        )
+        # Other colorizers of the same cases, written to combined-<variant>.json next to combined.json
+        variant_puzzles = [get_colorizer(variant) for variant in variants]
+        variant_svg_strings = [
+            outputs.enter_context(
+                CombinedWriter(output_path.parent / f"combined-{name}.json", combined_format, variant.svg_geometry() if compact else None)
+            )
+            for name, variant in zip(variants, variant_puzzles)
+        ]
+        # Optional PNG sprite atlas of all cases, atlas_size pixels on the longest side of a tile,
+        # and one atlas-<variant>.png per variant
+        atlas = SpriteAtlas(puzzle, atlas_size) if atlas_size is not None else None
+        variant_atlases = [SpriteAtlas(variant, atlas_size) if atlas_size is not None else None for variant in variant_puzzles]
+        for i, row in enumerate(df.filter(pl.col("Algs").is_not_null(), (pl.col("Algs") != "")).iter_rows(named=True)):
+            if len(filter) > 0 and row["Algset"] not in filter:
+                continue
+            alg = row['Algs'].split("\n")[0]
+            if "Pyraminx" in colorizer_name:
+                alg = clean_alg_pyraminx(alg)
+            alg = clean_alg(alg, puzzle.cube)
+            if "Skewb" in colorizer_name:
+                alg = clean_alg([alg for alg in row["Algs"].split("\n") if "H" not in alg and "S" not in alg][0], puzzle.cube)
+            if "FTO" in colorizer_name:
+                alg = clean_alg_fto(alg)
         
-        override_piece = None
-        if "Pyraminx" in colorizer_name and "TL4E-R L" in row['Algset']:
-            override_piece = "BRD"
-        puzzle.inverse(alg, filename, ref_rot_override=override_piece)
-        svg_strings[case_id] = puzzle.create_svg()
-        if puzzle.needs_invert():
-            alg = puzzle.inverse(alg, ref_rot_override=override_piece)
-        else:
-            puzzle.cube.scramble(alg)
-        ref_rot = puzzle.cube.to_reference_rotation(override_piece=override_piece)
-        if ref_rot != "" and not isinstance(puzzle, ThreeByThreeZBLSColorizer):
-            alg += " " + ref_rot
-        alg = puzzle.cube.normalize_moves(alg)
-        batch_solver_inputs.append(alg)
-        case_id += 1
+            override_piece = None
+            if "Pyraminx" in colorizer_name and "TL4E-R L" in row['Algset']:
+                override_piece = "BRD"
+            states = variant_states([puzzle, *variant_puzzles], alg, inverse=True, ref_rot_override=override_piece)
+            if optimize_svg:
+                # Trainers add the style once through combined.js, standalone files keep their own
+                svg = puzzle.render_optimized(states[0])
+                combined_svg = puzzle.render_optimized(states[0], inline_style=False)
+            else:
+                svg = combined_svg = puzzle.render(states[0])
+            images.write(f"{case_id}.svg", svg)
+            svg_strings.add(case_id, combined_svg, puzzle.color_string(states[0]) if compact else None)
+            if atlas is not None:
+                atlas.add(case_id, states[0])
+            for variant, state, variant_svgs, variant_atlas in zip(variant_puzzles, states[1:], variant_svg_strings, variant_atlases):
+                variant_svg = variant.render_optimized(state, inline_style=False) if optimize_svg else variant.render(state)
+                variant_svgs.add(case_id, variant_svg, variant.color_string(state) if compact else None)
+                if variant_atlas is not None:
+                    variant_atlas.add(case_id, state)
+            if puzzle.needs_invert():
+                alg = puzzle.inverse(alg, ref_rot_override=override_piece)
+            else:
+                puzzle.cube.scramble(alg)
+            ref_rot = puzzle.cube.to_reference_rotation(override_piece=override_piece)
+            if ref_rot != "" and not isinstance(puzzle, ThreeByThreeZBLSColorizer):
+                alg += " " + ref_rot
+            alg = puzzle.cube.normalize_moves(alg)
+            batch_solver_inputs.append(alg)
+            case_id += 1
     with open(output_path / "_batch_solver_extra.txt", "w") as file:
         file.write("Equivalences\n")
         file.write(puzzle.get_equivalences() + "\n")
@@ -165,21 +220,37 @@ def gen_images(colorizer_name: str, input_path: Path, output_path: Path, filter:
     with open(output_path / "_batch_solver_def.txt", "w") as file:
         file.write(puzzle.cube.mdefs)
 
+    # The batch solver merges setups that only differ in equivalent pieces or by an adjust and skips
+    # solved ones, so compare fingerprints reduced the same way instead of the setup strings.
+    fingerprinter = Fingerprinter(puzzle.cube, puzzle.get_equivalences())
+    keys = fingerprinter.fingerprint_algs(batch_solver_inputs, pre_adjust, post_adjust)
+    duplicates = find_duplicates(keys)
+    for i, b in duplicates:
+        print(f"Duplicate [{i}]: [{batch_solver_inputs[i]}] ", *df.row(i))
+        print(f"First occurance [{b}] [{batch_solver_inputs[b]}]: ", *df.row(b))
+    duplicate_indexes = {i for i, _ in duplicates}
+    solved = [
+        i for i, key in enumerate(fingerprinter.fingerprint_algs(batch_solver_inputs))
+        if key == fingerprinter.solved_key and i not in duplicate_indexes
+    ]
+    for i in solved:
+        print(f"Solved [{i}]: [{batch_solver_inputs[i]}] ", *df.row(i))
+
     with open(output_path / "_batch_solver_input.txt", "w") as file:
-        unique, inverses, counts = np.unique(batch_solver_inputs, return_inverse=True, return_counts=True)
-        for i, s in enumerate(batch_solver_inputs):
-            if s in batch_solver_inputs[:i]:
-                b = batch_solver_inputs.index(s)
-                print(f"Duplicate [{i}]: [{s}] ", *df.row(i))
-                print(f"First occurance [{b}] [{batch_solver_inputs[b]}]: ", *df.row(b))
-                
         file.write(make_batch_solver_string(batch_solver_inputs))
     
-    with open(output_path.parent / "combined.json", "w") as file:
-        json.dump(svg_strings, file)
+    if atlas is not None:
+        atlas.write(output_path.parent / "atlas.png", output_path.parent / "atlas.json")
+    for name, variant_atlas in zip(variants, variant_atlases):
+        if variant_atlas is not None:
+            variant_atlas.write(output_path.parent / f"atlas-{name}.png", output_path.parent / f"atlas-{name}.json")
     return {
         "df": df,
-        "setups": batch_solver_inputs
+        "setups": batch_solver_inputs,
+        "duplicates": duplicates,
+        "solved": solved,
+        # Only filled in the memory output mode
+        "images": images.files,
     }
 
 def make_batch_solver_string(batch_solver_inputs):
@@ -0,0 +1,163 @@
+"""Where ``gen_images`` puts the picture of every case.
+
+    files   one file per case in the pictures directory (the original layout)
+    zip     a single ``<pictures directory>.zip``
+    tar     a single ``<pictures directory>.tar``
+    memory  nothing is written, the pictures are kept in ``ImageOutput.files``
+
+Writes are collected in batches and handed to a background thread, so formatting the next cases
+doesn't wait for slow (e.g. network mounted) disks. Used as a context manager, an exception stops
+the output without finishing it: archives are deleted instead of left behind incomplete.
+"""
+import io
+import queue
+import tarfile
+import threading
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+OUTPUT_MODES = ("files", "zip", "tar", "memory")
+
+
+class ImageOutput(ABC):
+    # Number of pictures handed to the writer thread at once
+    batch_size = 64
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.files: Dict[str, str] = {}
+        self.batch: List[Tuple[str, str]] = []
+        self.error = None
+        self.aborted = False
+        self.queue = queue.Queue(maxsize=8)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, name: str, data: str) -> None:
+        self.batch.append((name, data))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.batch:
+            self.queue.put(self.batch)
+            self.batch = []
+
+    def run(self) -> None:
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            if self.error is not None or self.aborted:
+                continue
+            try:
+                self.write_batch(batch)
+            except BaseException as error:
+                self.error = error
+
+    def close(self) -> None:
+        """Write what is left, wait for the writer thread and raise anything it failed with."""
+        if not self.thread.is_alive():
+            return
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        try:
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.finish()
+
+    def abort(self) -> None:
+        """Stop after a failure elsewhere: drop the pictures not written yet and discard the output."""
+        if not self.thread.is_alive():
+            return
+        self.batch = []
+        self.aborted = True
+        self.queue.put(None)
+        self.thread.join()
+        self.discard()
+
+    @abstractmethod
+    def write_batch(self, batch: List[Tuple[str, str]]) -> None:
+        """Store a batch of (name, data) pictures, called on the writer thread."""
+
+    def finish(self) -> None:
+        """Complete the output once every batch is written."""
+
+    def discard(self) -> None:
+        """Clean up an aborted output. Pictures already written as loose files are kept."""
+        self.finish()
+
+
+class LooseFiles(ImageOutput):
+    def __init__(self, root: Path) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        super().__init__(root)
+
+    def write_batch(self, batch):
+        for name, data in batch:
+            with open(self.root / name, "w") as file:
+                file.write(data)
+
+
+class ZipArchive(ImageOutput):
+    def __init__(self, root: Path) -> None:
+        self.path = root.with_suffix(".zip")
+        self.archive = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        super().__init__(root)
+
+    def write_batch(self, batch):
+        for name, data in batch:
+            self.archive.writestr(name, data)
+
+    def finish(self):
+        self.archive.close()
+
+    def discard(self):
+        self.archive.close()
+        self.path.unlink(missing_ok=True)
+
+
+class TarArchive(ImageOutput):
+    def __init__(self, root: Path) -> None:
+        self.path = root.with_suffix(".tar")
+        self.archive = tarfile.open(self.path, "w")
+        super().__init__(root)
+
+    def write_batch(self, batch):
+        for name, data in batch:
+            encoded = data.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(encoded)
+            self.archive.addfile(info, io.BytesIO(encoded))
+
+    def finish(self):
+        self.archive.close()
+
+    def discard(self):
+        self.archive.close()
+        self.path.unlink(missing_ok=True)
+
+
+class InMemory(ImageOutput):
+    def write_batch(self, batch):
+        self.files.update(batch)
+
+
+def open_image_output(root: Path, output_mode: str = "files") -> ImageOutput:
+    outputs = {"files": LooseFiles, "zip": ZipArchive, "tar": TarArchive, "memory": InMemory}
+    if output_mode not in outputs:
+        raise ValueError(f"output_mode must be one of {', '.join(OUTPUT_MODES)}, not {output_mode}")
+    return outputs[output_mode](root)
@@ -5,17 +5,24 @@ from cubevis.solver.solver import (
     BatchResult,
     BatchSolverError,
     CaseResult,
+    SolverSession,
     SortingSpec,
     SubgroupSpec,
     run_batch,
+    run_batch_parallel,
 )
+from cubevis.solver.scheduler import SolverPool, run_batch_scheduled
 
 __all__ = [
     "BatchInput",
     "BatchResult",
     "BatchSolverError",
     "CaseResult",
+    "SolverPool",
+    "SolverSession",
     "SortingSpec",
     "SubgroupSpec",
     "run_batch",
+    "run_batch_parallel",
+    "run_batch_scheduled",
 ]
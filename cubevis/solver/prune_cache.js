@@ -0,0 +1,242 @@
+// On-disk cache of the pruning tables built by worker.js's getSubPuzzle.
+//
+// A pruning table only depends on the puzzle definition, the equivalences,
+// the ESQ (move weights), the subgroup, the prune depth and the adjust moves,
+// so it is written to <dir>/<sha256 of those>.prun after it was first built.
+// Later runs read the file straight into the buffers of a SharedPruneTable
+// and search it in place, without rebuilding the Map. Node can't mmap files,
+// and the tables have to live in SharedArrayBuffers to be shared with the
+// worker threads anyway, so they are read with plain reads of at most
+// IO_CHUNK_BYTES (a single read or write is limited to 2 GiB). Files whose
+// header doesn't match are rebuilt and overwritten.
+//
+// Hits touch the file's mtime. After writing a table, the least recently
+// used files are deleted until the directory fits in the byte budget given
+// by cubevis/solver/prune_cache.py, which can also trim the cache by hand.
+//
+// File layout (little endian):
+//
+//   0   "CVPRUN02"
+//   8   uint32 keyWidth, size, capacity, wideKeys, pruneDepth, costCount
+//   32  costs (costCount float64)
+//       keys (capacity * keyWidth chars, uint8 or uint16), padded to 8 bytes
+//       codes (capacity uint8, or uint16 past 255 costs, 0 for empty slots)
+//
+// See shared_prune_table.js for what the sections mean.
+
+const crypto = require("crypto");
+const fs = require("fs");
+const path = require("path");
+const { SharedPruneTable } = require(path.join(__dirname, "shared_prune_table.js"));
+
+const MAGIC = "CVPRUN02";
+const HEADER_BYTES = 32;
+const IO_CHUNK_BYTES = 1 << 30;
+
+function tableKey(input, ignore, subgroup, prune, adjust) {
+    const text = JSON.stringify([input.puzzle, ignore, input.esq, subgroup, prune, adjust]);
+    return crypto.createHash("sha256").update(text).digest("hex");
+}
+
+function padded(bytes) {
+    return Math.ceil(bytes / 8) * 8;
+}
+
+// Where every section of a table with these header fields is in the file
+function sections(buffers, costCount) {
+    const keys = buffers.capacity * buffers.keyWidth * (buffers.wideKeys ? 2 : 1);
+    const codes = buffers.capacity * (SharedPruneTable.wideCodes(costCount) ? 2 : 1);
+    const costsAt = HEADER_BYTES;
+    const keysAt = costsAt + costCount * 8;
+    const codesAt = keysAt + padded(keys);
+    return [
+        { name: "costs", at: costsAt, length: costCount * 8 },
+        { name: "keys", at: keysAt, length: keys },
+        { name: "codes", at: codesAt, length: codes },
+    ];
+}
+
+// Reads bytes.length bytes at `position`, returns false if the file ends first
+function readFully(fd, bytes, position, chunkBytes = IO_CHUNK_BYTES) {
+    let done = 0;
+    while (done < bytes.length) {
+        const part = bytes.subarray(done, Math.min(bytes.length, done + chunkBytes));
+        const read = fs.readSync(fd, part, 0, part.length, position + done);
+        if (read === 0) {
+            return false;
+        }
+        done += read;
+    }
+    return true;
+}
+
+function writeFully(fd, bytes, position, chunkBytes = IO_CHUNK_BYTES) {
+    let done = 0;
+    while (done < bytes.length) {
+        const part = bytes.subarray(done, Math.min(bytes.length, done + chunkBytes));
+        done += fs.writeSync(fd, part, 0, part.length, position + done);
+    }
+}
+
+function readTable(file) {
+    let fd;
+    try {
+        fd = fs.openSync(file, "r");
+    } catch (e) {
+        return null;
+    }
+    try {
+        const header = Buffer.alloc(HEADER_BYTES);
+        if (!readFully(fd, header, 0) || header.toString("latin1", 0, 8) !== MAGIC) {
+            return null;
+        }
+        const buffers = {
+            keyWidth: header.readUInt32LE(8),
+            size: header.readUInt32LE(12),
+            capacity: header.readUInt32LE(16),
+            wideKeys: header.readUInt32LE(20) === 1,
+        };
+        const depth = header.readUInt32LE(24);
+        for (const section of sections(buffers, header.readUInt32LE(28))) {
+            buffers[section.name] = new SharedArrayBuffer(section.length);
+            if (!readFully(fd, new Uint8Array(buffers[section.name]), section.at)) {
+                return null;
+            }
+        }
+        return { table: new SharedPruneTable(buffers), depth: depth };
+    } catch (e) {
+        return null;
+    } finally {
+        fs.closeSync(fd);
+    }
+}
+
+function tableBytes(buffers, costCount) {
+    const last = sections(buffers, costCount).pop();
+    return last.at + last.length;
+}
+
+// Deletes the least recently used tables in `dir` other than `keep` until
+// the directory holds at most maxBytes
+function evict(dir, maxBytes, keep) {
+    const entries = [];
+    let total = 0;
+    for (const name of fs.readdirSync(dir)) {
+        if (!name.endsWith(".prun")) {
+            continue;
+        }
+        const file = path.join(dir, name);
+        try {
+            const stat = fs.statSync(file);
+            total += stat.size;
+            if (file !== keep) {
+                entries.push({ file: file, size: stat.size, used: stat.mtimeMs });
+            }
+        } catch (e) {
+            // removed meanwhile
+        }
+    }
+    entries.sort((a, b) => a.used - b.used);
+    for (const entry of entries) {
+        if (total <= maxBytes) {
+            break;
+        }
+        try {
+            fs.unlinkSync(entry.file);
+            total -= entry.size;
+        } catch (e) {
+            // removed meanwhile
+        }
+    }
+}
+
+function writeTable(file, table, depth, maxBytes = Infinity) {
+    const buffers = table.buffers;
+    const costCount = buffers.costs.byteLength / 8;
+    if (tableBytes(buffers, costCount) > maxBytes) {
+        // Would push every other table out and still not fit
+        return;
+    }
+    const header = Buffer.alloc(HEADER_BYTES);
+    header.write(MAGIC, 0, "latin1");
+    header.writeUInt32LE(buffers.keyWidth, 8);
+    header.writeUInt32LE(buffers.size, 12);
+    header.writeUInt32LE(buffers.capacity, 16);
+    header.writeUInt32LE(buffers.wideKeys ? 1 : 0, 20);
+    header.writeUInt32LE(depth, 24);
+    header.writeUInt32LE(costCount, 28);
+    // Written under a temporary name first, so readers never see half a table
+    const tmp = file + "." + process.pid + "." + crypto.randomBytes(4).toString("hex") + ".tmp";
+    try {
+        fs.mkdirSync(path.dirname(file), { recursive: true });
+        const fd = fs.openSync(tmp, "w");
+        try {
+            writeFully(fd, header, 0);
+            for (const section of sections(buffers, costCount)) {
+                writeFully(fd, new Uint8Array(buffers[section.name]), section.at);
+            }
+        } finally {
+            fs.closeSync(fd);
+        }
+        fs.renameSync(tmp, file);
+    } catch (e) {
+        // The cache is only an optimisation, a failed write just means rebuilding next time
+        try { fs.unlinkSync(tmp); } catch (e2) { /* never created */ }
+        return;
+    }
+    if (maxBytes !== Infinity) {
+        try { evict(path.dirname(file), maxBytes, file); } catch (e) { /* trimmed next time */ }
+    }
+}
+
+// Wraps the global getSubPuzzle (and the Puzzle prune builders it calls) so
+// tables come from and go to `dir`, which is kept under maxBytes.
+// `currentInput` returns the input object of the batch being solved.
+function installPruneCache(dir, currentInput, maxBytes = Infinity) {
+    let pendingFile = null;
+    for (const name of ["createPrun", "createPrunSized"]) {
+        const build = Puzzle.prototype[name];
+        Puzzle.prototype[name] = function (limit) {
+            const file = pendingFile;
+            pendingFile = null;
+            if (file === null) {
+                return build.call(this, limit);
+            }
+            const cached = readTable(file);
+            if (cached !== null) {
+                this.pruneTable = cached.table;
+                this.pruneDepth = cached.depth;
+                const now = new Date();
+                try { fs.utimesSync(file, now, now); } catch (e) { /* removed meanwhile */ }
+                return;
+            }
+            build.call(this, limit);
+            this.pruneTable = SharedPruneTable.fromMap(this.pruneTable);
+            writeTable(file, this.pruneTable, this.pruneDepth, maxBytes);
+        };
+    }
+
+    const buildSubPuzzle = global.getSubPuzzle;
+    global.getSubPuzzle = function (pieceList, fullPuzzle, ignore, subgroup, prune, adjust) {
+        pendingFile = path.join(dir, tableKey(currentInput(), ignore, subgroup, prune, adjust) + ".prun");
+        try {
+            return buildSubPuzzle(pieceList, fullPuzzle, ignore, subgroup, prune, adjust);
+        } finally {
+            pendingFile = null;
+        }
+    };
+}
+
+// Installs the cache if the bridge got --prune-cache=DIR (and optionally
+// --prune-cache-max-bytes=N) on its command line
+function installPruneCacheFromArgs(argv, currentInput) {
+    const dirArg = argv.find((arg) => arg.startsWith("--prune-cache="));
+    if (!dirArg) {
+        return;
+    }
+    const maxBytesArg = argv.find((arg) => arg.startsWith("--prune-cache-max-bytes="));
+    const maxBytes = maxBytesArg ? Number(maxBytesArg.split("=")[1]) : Infinity;
+    installPruneCache(dirArg.slice("--prune-cache=".length), currentInput, maxBytes);
+}
+
+module.exports = { installPruneCache, installPruneCacheFromArgs, readFully, writeFully, readTable, writeTable };
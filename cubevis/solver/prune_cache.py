@@ -0,0 +1,155 @@
+"""On-disk cache of the worker's pruning tables.
+
+Building the pruning table of a subgroup is often the slowest part of a small
+batch, and for the same puzzle, equivalences, ESQ, subgroup, prune depth and
+adjust moves the table is identical every time. The Node bridges
+(``run_worker.js`` / ``serve_worker.js``) therefore save every table they build
+to ``<cache root>/prune/v2/<sha256>.prun`` and read it back on later runs
+(``prune_cache.js`` has the details and the file layout). The cache lives next
+to the compiled definitions of :mod:`cubevis.cube_cache` and follows the same
+``CUBEVIS_CACHE_DIR`` / ``CUBEVIS_NO_CACHE`` settings.
+
+Tables of big subgroups take hundreds of megabytes, so after writing a table
+the bridges delete the least recently used ones until the cache fits in
+:func:`max_cache_bytes` (4 GiB unless ``CUBEVIS_PRUNE_CACHE_MAX_BYTES`` says
+otherwise; tables bigger than that are not cached at all). Use :func:`evict`
+(or ``python -m cubevis.solver.prune_cache --max-bytes N``) to trim it further.
+"""
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+from cubevis.cube_cache import cache_enabled, cache_root
+
+# Bump together with MAGIC in prune_cache.js whenever the file layout changes.
+PRUNE_CACHE_VERSION = 2
+
+DEFAULT_MAX_CACHE_BYTES = 4 * 1024 ** 3
+
+_MAGIC = b"CVPRUN02"
+_HEADER = struct.Struct("<8s6I")
+
+
+def prune_cache_dir() -> Path:
+    return cache_root() / "prune" / f"v{PRUNE_CACHE_VERSION}"
+
+
+def max_cache_bytes() -> int:
+    """Size the bridges trim the cache to after writing a table."""
+    return int(os.environ.get("CUBEVIS_PRUNE_CACHE_MAX_BYTES", DEFAULT_MAX_CACHE_BYTES))
+
+
+def bridge_args() -> list[str]:
+    """Command line arguments enabling the cache in the Node bridges."""
+    if not cache_enabled():
+        return []
+    return [f"--prune-cache={prune_cache_dir()}", f"--prune-cache-max-bytes={max_cache_bytes()}"]
+
+
+@dataclass
+class PruneTableEntry:
+    path: Path
+    size_bytes: int
+    # Timestamp of the last build or load, the bridges touch the file on every hit
+    last_used: float
+    # Positions in the table and the depth it was built to, None for unreadable files
+    positions: Optional[int] = None
+    depth: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return self.path.stem
+
+
+def list_tables() -> list[PruneTableEntry]:
+    """All cached tables, most recently used first."""
+    entries = []
+    for path in prune_cache_dir().glob("*.prun"):
+        try:
+            stat = path.stat()
+            with path.open("rb") as f:
+                header = f.read(_HEADER.size)
+        except OSError:
+            continue
+        entry = PruneTableEntry(path=path, size_bytes=stat.st_size, last_used=stat.st_mtime)
+        if len(header) == _HEADER.size:
+            magic, _, positions, _, _, depth, _ = _HEADER.unpack(header)
+            if magic == _MAGIC:
+                entry.positions = positions
+                entry.depth = depth
+        entries.append(entry)
+    entries.sort(key=lambda entry: -entry.last_used)
+    return entries
+
+
+def cache_size() -> int:
+    """Total size of the cached tables in bytes."""
+    return sum(entry.size_bytes for entry in list_tables())
+
+
+def evict(max_bytes: int) -> list[PruneTableEntry]:
+    """Delete least recently used tables until at most ``max_bytes`` remain. Returns the deleted ones."""
+    entries = list_tables()
+    total = sum(entry.size_bytes for entry in entries)
+    evicted = []
+    while entries and total > max_bytes:
+        entry = entries.pop()
+        try:
+            entry.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        total -= entry.size_bytes
+        evicted.append(entry)
+    return evicted
+
+
+def clear() -> list[PruneTableEntry]:
+    """Delete every cached table."""
+    return evict(0)
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+app = typer.Typer(
+    add_completion=False,
+    help="List and trim the on-disk cache of solver pruning tables.",
+)
+
+
+@app.command()
+def manage(
+    max_bytes: Optional[int] = typer.Option(
+        None, "--max-bytes",
+        help="Delete least recently used tables until the cache fits in this many bytes.",
+    ),
+    clear_all: bool = typer.Option(
+        False, "--clear",
+        help="Delete every cached table.",
+    ),
+) -> None:
+    """Print the cached pruning tables, optionally evicting some first."""
+    if clear_all:
+        max_bytes = 0
+    if max_bytes is not None:
+        evicted = evict(max_bytes)
+        typer.echo(f"evicted {len(evicted)} tables ({_format_bytes(sum(e.size_bytes for e in evicted))})")
+    entries = list_tables()
+    for entry in entries:
+        typer.echo(f"{entry.key[:16]}  {_format_bytes(entry.size_bytes):>10}  positions={entry.positions} depth={entry.depth}")
+    typer.echo(f"{len(entries)} tables, {_format_bytes(sum(e.size_bytes for e in entries))} in {prune_cache_dir()}")
+
+
+if __name__ == "__main__":
+    app()
@@ -7,8 +7,21 @@
 //
 // Special-cases: Map instances (only the `moveWeights` message carries one)
 // are serialised as arrays of [key, value] pairs so they survive JSON.
+//
+// With --threads=N (N > 1) the pruning tables are built once, moved into
+// SharedArrayBuffers and the cases are solved by N worker_threads, which
+// take the next case whenever they finish one. Messages are still written
+// in case order, exactly as the single threaded run writes them.
+//
+// With --prune-cache=DIR pruning tables are loaded from / saved to DIR, which
+// --prune-cache-max-bytes=N keeps under N bytes, see prune_cache.js.
 
+const fs = require("fs");
 const path = require("path");
+const vm = require("vm");
+const { Worker, isMainThread, parentPort, workerData } = require("worker_threads");
+const { SharedPruneTable } = require(path.join(__dirname, "shared_prune_table.js"));
+const { installPruneCacheFromArgs } = require(path.join(__dirname, "prune_cache.js"));
 
 function encodeValue(v) {
     if (v instanceof Map) {
@@ -17,35 +30,160 @@ function encodeValue(v) {
     return v;
 }
 
+function writeMessage(out) {
+    process.stdout.write(JSON.stringify(out) + "\n");
+}
+
 global.self = {};
 global.postMessage = function (msg) {
-    const out = { type: msg.type, value: encodeValue(msg.value) };
-    process.stdout.write(JSON.stringify(out) + "\n");
+    writeMessage({ type: msg.type, value: encodeValue(msg.value) });
 };
 
 // Loading worker.js executes its top-level code, which assigns self.onmessage.
-require(path.join(__dirname, "worker.js"));
+// It runs as a script so its functions (setPuzzles, calcState, ...) are globals
+// the threaded mode can call.
+const workerPath = path.join(__dirname, "worker.js");
+vm.runInThisContext(fs.readFileSync(workerPath, "utf8"), { filename: workerPath });
 
-let stdinData = "";
-process.stdin.setEncoding("utf8");
-process.stdin.on("data", (chunk) => { stdinData += chunk; });
-process.stdin.on("end", () => {
-    let input;
-    try {
-        input = JSON.parse(stdinData);
-    } catch (e) {
-        process.stderr.write("Failed to parse input JSON: " + e.message + "\n");
-        process.exit(2);
+// Same steps as worker.js's main(), with calcState spread over worker threads.
+function runThreaded(input, threads) {
+    const scramble = input.solve;
+    if (scramble.includes(":")) {
+        postMessage({ value: "Colon notation for indicating adjust moves is deprecated.", type: "stop" });
+    }
+    const [fullPuzzle, batchStates, subPuzzles] = setPuzzles(scramble, input.puzzle, input.ignore, input.subgroups, input.preAdjust, input.postAdjust, input.sorting, input.esq);
+    postMessage({ value: parseESQ(input.rankesq), type: "moveWeights" });
+    const [modifiers, startNum] = parseModifiers(scramble);
+    const jobs = [];
+    let caseNum = 1;
+    let solutionIndex = 1;
+    for (const stateStr of batchStates) {
+        const state = fullPuzzle.execute(fullPuzzle.solved, fullPuzzle.moveStrToList(stateStr));
+        if (!(arraysEqual(fullPuzzle.solved, state))) {
+            if (caseNum >= startNum || modifiers.has(caseNum)) {
+                jobs.push({ index: solutionIndex, setup: stateStr, num: caseNum });
+                solutionIndex++;
+            }
+            caseNum++;
+        }
+    }
+    if (jobs.length === 0) {
+        postMessage({ value: null, type: "stop" });
+        process.exit(0);
+    }
+
+    // fromMap empties the Maps, so only the shared tables are left when the threads start
+    const tables = subPuzzles.map((sub) => {
+        let table = sub.puzzle.pruneTable;
+        if (!(table instanceof SharedPruneTable)) {
+            table = SharedPruneTable.fromMap(table);
+            sub.puzzle.pruneTable = table;
+        }
+        return { buffers: table.buffers, depth: sub.puzzle.pruneDepth };
+    });
+    // The threads get their cases from here, so they set up the puzzles without the batch
+    const threadInput = Object.assign({}, input, { solve: "[\n]" });
+
+    // Messages of every case, written out as soon as all earlier cases are done
+    const results = new Array(jobs.length);
+    let nextJob = 0;
+    let written = 0;
+
+    function dispatch(thread) {
+        if (nextJob < jobs.length) {
+            thread.postMessage({ position: nextJob, setup: jobs[nextJob].setup });
+            nextJob++;
+        }
     }
-    if (typeof self.onmessage !== "function") {
-        process.stderr.write("worker.js did not register self.onmessage\n");
-        process.exit(3);
+
+    function flush() {
+        while (written < jobs.length && results[written] !== undefined) {
+            writeMessage({ type: "next-state", value: jobs[written] });
+            for (const msg of results[written]) {
+                writeMessage(msg);
+            }
+            results[written] = null;
+            written++;
+        }
+        if (written === jobs.length) {
+            postMessage({ value: null, type: "stop" });
+            process.exit(0);
+        }
     }
-    try {
-        self.onmessage({ data: input });
-    } catch (e) {
-        process.stderr.write("Worker main threw: " + (e && e.stack ? e.stack : String(e)) + "\n");
-        process.exit(4);
+
+    for (let i = 0; i < Math.min(threads, jobs.length); i++) {
+        const thread = new Worker(__filename, { workerData: { input: threadInput, tables: tables } });
+        thread.on("message", (done) => {
+            results[done.position] = done.messages;
+            dispatch(thread);
+            flush();
+        });
+        thread.on("error", (e) => {
+            process.stderr.write("Worker thread threw: " + (e && e.stack ? e.stack : String(e)) + "\n");
+            process.exit(4);
+        });
+        dispatch(thread);
     }
-    process.exit(0);
-});
+}
+
+function runThread() {
+    const input = workerData.input;
+    // Subgroups get the pruning tables built by the main thread instead of building their own
+    let nextTable = 0;
+    Puzzle.prototype.createPrun = Puzzle.prototype.createPrunSized = function () {
+        const table = workerData.tables[nextTable++];
+        this.pruneTable = new SharedPruneTable(table.buffers);
+        this.pruneDepth = table.depth;
+    };
+    // Messages from setting up the puzzles were already written by the main thread
+    let messages = null;
+    global.postMessage = function (msg) {
+        if (messages !== null) {
+            messages.push({ type: msg.type, value: encodeValue(msg.value) });
+        }
+    };
+    const [fullPuzzle, , subPuzzles] = setPuzzles(input.solve, input.puzzle, input.ignore, input.subgroups, input.preAdjust, input.postAdjust, input.sorting, input.esq);
+    parentPort.on("message", (job) => {
+        messages = [];
+        const state = fullPuzzle.execute(fullPuzzle.solved, fullPuzzle.moveStrToList(job.setup));
+        calcState(state, subPuzzles, input.showPost, input.optimise);
+        parentPort.postMessage({ position: job.position, messages: messages });
+        messages = null;
+    });
+}
+
+if (!isMainThread) {
+    runThread();
+} else {
+    const threadsArg = process.argv.find((arg) => arg.startsWith("--threads="));
+    const threads = threadsArg ? parseInt(threadsArg.split("=")[1], 10) : 1;
+    let input;
+    installPruneCacheFromArgs(process.argv, () => input);
+
+    let stdinData = "";
+    process.stdin.setEncoding("utf8");
+    process.stdin.on("data", (chunk) => { stdinData += chunk; });
+    process.stdin.on("end", () => {
+        try {
+            input = JSON.parse(stdinData);
+        } catch (e) {
+            process.stderr.write("Failed to parse input JSON: " + e.message + "\n");
+            process.exit(2);
+        }
+        if (typeof self.onmessage !== "function") {
+            process.stderr.write("worker.js did not register self.onmessage\n");
+            process.exit(3);
+        }
+        try {
+            if (threads > 1 && input.puzzle) {
+                runThreaded(input, threads);
+                return;
+            }
+            self.onmessage({ data: input });
+        } catch (e) {
+            process.stderr.write("Worker main threw: " + (e && e.stack ? e.stack : String(e)) + "\n");
+            process.exit(4);
+        }
+        process.exit(0);
+    });
+}
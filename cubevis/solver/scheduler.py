@@ -0,0 +1,209 @@
+"""Dynamic scheduling of batch solves over a pool of warm solver servers.
+
+Solve times of single cases differ by orders of magnitude, so splitting a
+batch into fixed shards leaves processes idle while one shard still works
+on its hard cases. :class:`SolverPool` instead keeps ``workers``
+:class:`~cubevis.solver.solver.SolverSession` servers running and hands
+them small chunks of cases from a shared queue, hardest first, until the
+queue is empty. Every chunk is sent as a batch of just its own setups, so a
+request costs the same however big the whole batch is.
+
+Pruning tables are kept by every server and reused for every chunk (and
+every later batch on the same pool), but each server holds its own copy.
+With the on-disk prune cache enabled (see :mod:`cubevis.solver.prune_cache`)
+the first server builds them before the others start, which then read them
+from disk instead of building them again.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Optional
+
+from cubevis.solver.prune_cache import bridge_args
+from cubevis.solver.solver import (
+    BatchInput,
+    BatchResult,
+    MessageCallback,
+    SolverSession,
+    _check_result,
+    _make_progress,
+)
+
+
+class SolverPool:
+    """``workers`` solver servers fed from a shared queue of cases::
+
+        with SolverPool(workers=8) as pool:
+            result = pool.run(inp)
+
+    ``pool.timings`` maps every solved setup to the seconds its chunk took
+    per case; they order the queue of later runs on the pool. Pass them (or
+    timings saved from an earlier pool) as ``costs`` to reuse them elsewhere.
+    Cases without a timing are estimated by their setup length.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        node_path: Path = Path("node"),
+        max_old_space_size_mb: int = 1024 * 1024,
+    ) -> None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.sessions = [
+            SolverSession(node_path=node_path, max_old_space_size_mb=max_old_space_size_mb)
+            for _ in range(max(1, workers))
+        ]
+        self.timings: dict[str, float] = {}
+
+    def __enter__(self) -> "SolverPool":
+        for session in self.sessions:
+            session.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for session in self.sessions:
+            session.close()
+
+    def estimate_costs(self, setups: list[str], costs: Optional[dict[str, float]] = None) -> list[float]:
+        """Expected solve time of every setup, in seconds when timings are known."""
+        known = dict(self.timings)
+        if costs is not None:
+            known.update(costs)
+        lengths = [max(1, len(setup.split())) for setup in setups]
+        timed = [(known[setup], length) for setup, length in zip(setups, lengths) if setup in known]
+        # Seconds per move of setup, to put estimated and timed cases on the same scale
+        per_move = sum(t for t, _ in timed) / sum(n for _, n in timed) if timed else 1.0
+        return [known.get(setup, length * per_move) for setup, length in zip(setups, lengths)]
+
+    def run(
+        self,
+        inp: BatchInput,
+        *,
+        chunk_size: int = 1,
+        costs: Optional[dict[str, float]] = None,
+        on_message: Optional[MessageCallback] = None,
+        show_progress: bool = True,
+    ) -> BatchResult:
+        """Solve ``inp`` like :func:`~cubevis.solver.solver.run_batch`.
+
+        Every chunk of ``chunk_size`` cases is one request to a server with
+        only the setups of that chunk; their cases are renumbered to match a
+        single run. ``on_message`` gets the total ``num-states`` once, then the
+        messages of all chunks as they arrive, interleaved between servers.
+        """
+        probe = self.sessions[0].run(dataclasses.replace(inp, subgroups=[]), show_progress=False)
+        if on_message is not None:
+            on_message({"type": "num-states", "value": probe.num_states})
+        if len(self.sessions) > 1 and bridge_args():
+            # Cases are handed out hardest first, so all servers would build the
+            # same pruning tables at once. Build them on one server and let the
+            # others read them from the prune cache.
+            self.sessions[0].run(dataclasses.replace(inp, solve="[\n]"), show_progress=False)
+        setups = {case.case_num: case.setup for case in probe.cases}
+        case_costs = self.estimate_costs([case.setup for case in probe.cases], costs)
+        ordered = [
+            case.case_num
+            for _, case in sorted(zip(case_costs, probe.cases), key=lambda pair: -pair[0])
+        ]
+        chunks: queue.Queue[list[int]] = queue.Queue()
+        for i in range(0, len(ordered), chunk_size):
+            chunks.put(ordered[i:i + chunk_size])
+
+        lock = threading.Lock()
+        failed = threading.Event()
+        errors: list[BaseException] = []
+        shard_results: list[BatchResult] = []
+        progress = _make_progress() if show_progress else None
+        task_id = None
+        if progress is not None:
+            task_id = progress.add_task(
+                f"Solving {len(ordered)} cases in {len(self.sessions)} processes", total=len(ordered)
+            )
+
+        def renumber(case_nums: dict[str, int], msg: dict[str, Any]) -> dict[str, Any]:
+            # The server numbers the cases of a chunk from 1, use the numbers of the whole batch
+            if msg.get("type") != "next-state":
+                return msg
+            case_num = case_nums[str(msg["value"]["setup"]).strip()]
+            return {**msg, "value": {**msg["value"], "num": case_num, "setup": setups[case_num]}}
+
+        def forward(msg: dict[str, Any]) -> None:
+            with lock:
+                if progress is not None and task_id is not None and msg.get("type") == "next-state":
+                    progress.update(task_id, advance=1)
+                if on_message is not None and msg.get("type") != "num-states":
+                    on_message(msg)
+
+        def work(session: SolverSession) -> None:
+            while not failed.is_set():
+                try:
+                    chunk = chunks.get_nowait()
+                except queue.Empty:
+                    return
+                case_nums = {setups[case_num].strip(): case_num for case_num in chunk}
+                solve = "[\n" + ",\n".join(case_nums) + "\n]"
+                start = time.perf_counter()
+                try:
+                    shard_result = session.run(
+                        dataclasses.replace(inp, solve=solve),
+                        on_message=lambda msg: forward(renumber(case_nums, msg)),
+                        show_progress=False,
+                    )
+                    for case in shard_result.cases:
+                        case.case_num = case_nums[case.setup.strip()]
+                        case.setup = setups[case.case_num]
+                except BaseException as error:
+                    with lock:
+                        errors.append(error)
+                    failed.set()
+                    return
+                elapsed = (time.perf_counter() - start) / len(chunk)
+                with lock:
+                    shard_results.append(shard_result)
+                    for case_num in chunk:
+                        self.timings[setups[case_num]] = elapsed
+
+        with progress if progress is not None else nullcontext():
+            threads = [threading.Thread(target=work, args=(session,), daemon=True) for session in self.sessions]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+        result = BatchResult(num_states=probe.num_states, move_weights=probe.move_weights)
+        for shard_result in shard_results:
+            result.cases += shard_result.cases
+            result.bfs_progress += shard_result.bfs_progress
+        result.cases.sort(key=lambda case: case.case_num)
+        for index, case in enumerate(result.cases, start=1):
+            case.index = index
+        return _check_result(result)
+
+
+def run_batch_scheduled(
+    inp: BatchInput,
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = 1,
+    costs: Optional[dict[str, float]] = None,
+    node_path: Path = Path("node"),
+    on_message: Optional[MessageCallback] = None,
+    show_progress: bool = True,
+    max_old_space_size_mb: int = 1024 * 1024,
+) -> BatchResult:
+    """One batch on a temporary :class:`SolverPool`, see :meth:`SolverPool.run`."""
+    with SolverPool(workers, node_path=node_path, max_old_space_size_mb=max_old_space_size_mb) as pool:
+        return pool.run(inp, chunk_size=chunk_size, costs=costs, on_message=on_message, show_progress=show_progress)
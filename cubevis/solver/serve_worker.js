@@ -0,0 +1,105 @@
+// Long-lived Node.js server for cubevis/solver/worker.js
+//
+// Unlike run_worker.js, which solves a single input and exits, this bridge
+// reads one request per line from stdin and keeps running until stdin closes:
+//
+//   {"id": 1, "input": {...}}        solve a batch (same object run_worker.js reads)
+//   {"id": 2, "command": "clear"}    drop the cached pruning tables
+//
+// Every message the worker posts for a request is written to stdout as one
+// JSON line tagged with the request id, and each request ends with
+//
+//   {"id": 1, "type": "done", "value": null | "<error>"}
+//
+// Pruning tables built by getSubPuzzle are kept between requests, keyed by
+// the puzzle definition, equivalences, ESQ, subgroup, prune depth and adjust
+// moves, so repeated batches on the same puzzle skip rebuilding them. At most
+// --max-tables=N tables (default 8) are kept, least recently used go first.
+// With --prune-cache=DIR tables missing from memory are loaded from / saved
+// to DIR, which --prune-cache-max-bytes=N keeps under N bytes, see prune_cache.js.
+
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const vm = require("vm");
+const { installPruneCacheFromArgs } = require(path.join(__dirname, "prune_cache.js"));
+
+function encodeValue(v) {
+    if (v instanceof Map) {
+        return Array.from(v.entries());
+    }
+    return v;
+}
+
+let currentId = null;
+let currentInput = null;
+
+global.self = {};
+global.postMessage = function (msg) {
+    const out = { id: currentId, type: msg.type, value: encodeValue(msg.value) };
+    process.stdout.write(JSON.stringify(out) + "\n");
+};
+
+// Run worker.js as a script so its top level functions are globals that can be wrapped below.
+const workerPath = path.join(__dirname, "worker.js");
+vm.runInThisContext(fs.readFileSync(workerPath, "utf8"), { filename: workerPath });
+
+installPruneCacheFromArgs(process.argv, () => currentInput);
+
+const maxTablesArg = process.argv.find((arg) => arg.startsWith("--max-tables="));
+const maxTables = maxTablesArg ? parseInt(maxTablesArg.split("=")[1], 10) : 8;
+const subPuzzleCache = new Map();
+const buildSubPuzzle = global.getSubPuzzle;
+
+global.getSubPuzzle = function (pieceList, fullPuzzle, ignore, subgroup, prune, adjust) {
+    const key = JSON.stringify([
+        currentInput.puzzle, ignore, currentInput.esq, subgroup, prune, adjust,
+    ]);
+    let subPuzzle = subPuzzleCache.get(key);
+    if (subPuzzle === undefined) {
+        subPuzzle = buildSubPuzzle(pieceList, fullPuzzle, ignore, subgroup, prune, adjust);
+    } else {
+        subPuzzleCache.delete(key);
+    }
+    subPuzzleCache.set(key, subPuzzle);
+    while (subPuzzleCache.size > maxTables) {
+        subPuzzleCache.delete(subPuzzleCache.keys().next().value);
+    }
+    return subPuzzle;
+};
+
+function done(id, error) {
+    process.stdout.write(JSON.stringify({ id: id, type: "done", value: error }) + "\n");
+}
+
+const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+lines.on("line", (line) => {
+    if (line.trim() === "") {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        done(null, "Failed to parse request JSON: " + e.message);
+        return;
+    }
+    currentId = request.id;
+    if (request.command === "clear") {
+        subPuzzleCache.clear();
+        done(request.id, null);
+        return;
+    }
+    if (typeof self.onmessage !== "function") {
+        done(request.id, "worker.js did not register self.onmessage");
+        return;
+    }
+    currentInput = request.input;
+    try {
+        self.onmessage({ data: request.input });
+        done(request.id, null);
+    } catch (e) {
+        done(request.id, "Worker main threw: " + (e && e.stack ? e.stack : String(e)));
+    }
+});
+lines.on("close", () => process.exit(0));
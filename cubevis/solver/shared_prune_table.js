@@ -0,0 +1,120 @@
+// Read-only pruning table in SharedArrayBuffers, shared by worker_threads.
+//
+// worker.js keeps pruning tables in a Map from compressArr() strings (one
+// char per piece) to distances. This packs such a Map into an open
+// addressing hash table whose buffers can be posted to other threads
+// without copying, and offers the same get(key) lookup the search uses.
+//
+// A table only holds a handful of different distances, so slots store the
+// position of their distance in `costs` plus one (uint8, or uint16 past 255
+// distances), 0 marking an empty slot. With one byte per key char and a
+// load factor of 0.75 a slot takes keyWidth + 1 bytes, a fraction of what
+// the Map spends on the same entry.
+
+const MAX_LOAD = 0.75;
+
+function hashKey(key) {
+    // FNV-1a over the char codes
+    let h = 2166136261;
+    for (let i = 0; i < key.length; i++) {
+        h ^= key.charCodeAt(i);
+        h = Math.imul(h, 16777619);
+    }
+    return h >>> 0;
+}
+
+function tableCapacity(size) {
+    return Math.max(16, Math.ceil(size / MAX_LOAD));
+}
+
+class SharedPruneTable {
+    constructor(buffers) {
+        this.buffers = buffers;
+        this.keyWidth = buffers.keyWidth;
+        this.size = buffers.size;
+        this.capacity = buffers.capacity;
+        this.keys = buffers.wideKeys ? new Uint16Array(buffers.keys) : new Uint8Array(buffers.keys);
+        this.costs = new Float64Array(buffers.costs);
+        this.codes = SharedPruneTable.wideCodes(this.costs.length) ? new Uint16Array(buffers.codes) : new Uint8Array(buffers.codes);
+    }
+
+    static wideCodes(costCount) {
+        return costCount > 255;
+    }
+
+    // Packs `map` into a new table and empties it on the way, so the Map's
+    // memory can be collected while the table fills instead of afterwards.
+    static fromMap(map) {
+        let keyWidth = 0;
+        let wideKeys = false;
+        const costIndex = new Map();
+        for (const [key, value] of map) {
+            keyWidth = key.length;
+            for (let i = 0; i < key.length; i++) {
+                if (key.charCodeAt(i) > 255) {
+                    wideKeys = true;
+                }
+            }
+            if (!costIndex.has(value)) {
+                costIndex.set(value, costIndex.size + 1);
+            }
+        }
+        if (costIndex.size > 65535) {
+            throw new Error("Pruning table has more than 65535 different distances");
+        }
+        const capacity = tableCapacity(map.size);
+        const wideCodes = SharedPruneTable.wideCodes(costIndex.size);
+        const buffers = {
+            keyWidth: keyWidth,
+            size: map.size,
+            capacity: capacity,
+            wideKeys: wideKeys,
+            keys: new SharedArrayBuffer(capacity * keyWidth * (wideKeys ? 2 : 1)),
+            costs: new SharedArrayBuffer(costIndex.size * 8),
+            codes: new SharedArrayBuffer(capacity * (wideCodes ? 2 : 1)),
+        };
+        const table = new SharedPruneTable(buffers);
+        table.costs.set(Array.from(costIndex.keys()));
+        for (const [key, value] of map) {
+            let slot = hashKey(key) % capacity;
+            while (table.codes[slot] !== 0) {
+                slot = slot + 1 === capacity ? 0 : slot + 1;
+            }
+            const offset = slot * keyWidth;
+            for (let i = 0; i < keyWidth; i++) {
+                table.keys[offset + i] = key.charCodeAt(i);
+            }
+            table.codes[slot] = costIndex.get(value);
+            map.delete(key);
+        }
+        return table;
+    }
+
+    get(key) {
+        if (key.length !== this.keyWidth) {
+            return undefined;
+        }
+        let slot = hashKey(key) % this.capacity;
+        while (true) {
+            const code = this.codes[slot];
+            if (code === 0) {
+                return undefined;
+            }
+            const offset = slot * this.keyWidth;
+            let i = 0;
+            while (i < this.keyWidth && this.keys[offset + i] === key.charCodeAt(i)) {
+                i++;
+            }
+            if (i === this.keyWidth) {
+                return this.costs[code - 1];
+            }
+            slot = slot + 1 === this.capacity ? 0 : slot + 1;
+        }
+    }
+
+    has(key) {
+        return this.get(key) !== undefined;
+    }
+}
+
+module.exports = { SharedPruneTable };
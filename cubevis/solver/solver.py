@@ -3,7 +3,10 @@
 Spawns Node.js on ``cubevis/solver/run_worker.js`` (a thin bridge that shims
 ``self``/``postMessage`` and delegates to ``cubevis/solver/worker.js``), feeds
 the input as JSON via stdin, and parses the stream of newline-delimited JSON
-messages the worker emits.
+messages the worker emits. :class:`SolverSession` instead keeps one Node.js
+server (``cubevis/solver/serve_worker.js``) running for many batches, so
+pruning tables are built once per puzzle and subgroup. Both bridges also keep
+pruning tables on disk between runs, see :mod:`cubevis.solver.prune_cache`.
 
 The :class:`BatchInput` dataclass exposes exactly the same 11 options as
 ``worker.js``'s ``main(input)`` function; field names match the JS-side keys
@@ -15,12 +18,16 @@ from pathlib import Path
 
 import dataclasses
 import json
+import os
 import subprocess
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 import typer
 from rich.progress import (
@@ -35,7 +42,10 @@ from rich.progress import (
 )
 from rich.text import Text
 
+from cubevis.solver.prune_cache import bridge_args
+
 _BRIDGE_JS = Path(__file__).with_name("run_worker.js")
+_SERVER_JS = Path(__file__).with_name("serve_worker.js")
 
 
 class _CasesPerSecondColumn(ProgressColumn):
@@ -154,6 +164,113 @@ class BatchResult:
 MessageCallback = Callable[[dict[str, Any]], None]
 
 
+def _parse_lines(lines: Iterable[str], result: BatchResult) -> Iterator[dict[str, Any]]:
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            result.errors.append(f"Malformed JSON from worker: {line!r}")
+
+
+def _make_progress() -> Progress:
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>5.1f}%"),
+        _CasesPerSecondColumn(),
+        TimeElapsedColumn(),
+        TimeRemainingColumn(),
+        transient=False,
+    )
+
+
+def _collect_messages(
+    messages: Iterable[dict[str, Any]],
+    result: BatchResult,
+    on_message: Optional[MessageCallback],
+    show_progress: bool,
+) -> None:
+    """Fill ``result`` from worker messages until the terminal ``stop``."""
+    if show_progress:
+        progress = _make_progress()
+        progress_ctx: Any = progress
+    else:
+        progress = None
+        progress_ctx = nullcontext()
+
+    with progress_ctx:
+        task_id = None
+        if progress is not None:
+            task_id = progress.add_task("Preparing solver…", total=None, start=False)
+
+        for msg in messages:
+            if on_message is not None:
+                on_message(msg)
+
+            mtype = msg.get("type")
+            mval = msg.get("value")
+
+            if mtype == "moveWeights":
+                # Bridge converts JS Map -> list of [k, v] pairs.
+                if isinstance(mval, list):
+                    result.move_weights = {k: v for k, v in mval}
+            elif mtype == "num-states":
+                if isinstance(mval, int):
+                    result.num_states = mval
+                    if progress is not None and task_id is not None:
+                        progress.update(
+                            task_id,
+                            total=mval,
+                            description=f"Solving {mval} cases",
+                        )
+                        progress.start_task(task_id)
+                else:
+                    result.bfs_progress.append(str(mval))
+                    if progress is not None and task_id is not None:
+                        progress.update(
+                            task_id,
+                            description=f"BFS: {mval}",
+                        )
+            elif mtype == "next-state":
+                result.cases.append(CaseResult(
+                    index=int(mval["index"]),
+                    case_num=int(mval["num"]),
+                    setup=str(mval["setup"]),
+                ))
+                if progress is not None and task_id is not None:
+                    progress.update(task_id, advance=1)
+            elif mtype == "solution":
+                if result.cases:
+                    result.cases[-1].solutions.append(str(mval))
+                else:
+                    result.errors.append(f"Stray solution before next-state: {mval!r}")
+            elif mtype == "stop":
+                if mval is None:
+                    # Terminal stop — consume any remaining output then break.
+                    break
+                result.errors.append(str(mval))
+            # depthUpdate / set-depth / debug are ignored here but still delivered
+            # to on_message for callers that want them.
+
+
+def _check_result(result: BatchResult) -> BatchResult:
+    if result.errors:
+        raise BatchSolverError("Worker reported errors: " + " | ".join(result.errors))
+
+    if result.num_states is not None and result.num_states != len(result.cases):
+        raise BatchSolverError(
+            f"Case count mismatch: worker reported num_states={result.num_states} "
+            f"but received {len(result.cases)} next-state messages."
+        )
+
+    return result
+
+
 def run_batch(
     inp: BatchInput,
     *,
@@ -161,6 +278,8 @@ def run_batch(
     on_message: Optional[MessageCallback] = None,
     show_progress: bool = True,
     max_old_space_size_mb: int = 1024 * 1024,
+    session: Optional["SolverSession"] = None,
+    threads: int = 1,
 ) -> BatchResult:
     """Run the BatchSolver worker on ``inp`` and return the collected results.
 
@@ -182,6 +301,15 @@ def run_batch(
         Value passed to Node's ``--max-old-space-size`` flag (in MB). Defaults
         to 1 TiB so the V8 heap effectively never caps the run; the OS remains
         the real limit.
+    session:
+        Optional running :class:`SolverSession`. The batch is then solved by
+        its long-lived server, reusing pruning tables of earlier batches, and
+        ``node_path`` / ``max_old_space_size_mb`` / ``threads`` are ignored.
+    threads:
+        Number of worker threads solving cases inside the Node process. With
+        more than one, the pruning tables are built once and shared between
+        the threads (SharedArrayBuffer), so unlike :func:`run_batch_parallel`
+        memory doesn't grow per core. Results are identical to a single thread.
 
     Raises
     ------
@@ -190,6 +318,9 @@ def run_batch(
         exited with a non-zero code, or if the reported ``num-states`` does not
         match the number of ``next-state`` messages received.
     """
+    if session is not None:
+        return session.run(inp, on_message=on_message, show_progress=show_progress)
+
     if not _BRIDGE_JS.exists():
         raise FileNotFoundError(f"Node bridge not found at {_BRIDGE_JS}")
 
@@ -198,6 +329,8 @@ def run_batch(
             node_path.as_posix(),
             f"--max-old-space-size={max_old_space_size_mb}",
             str(_BRIDGE_JS),
+            f"--threads={threads}",
+            *bridge_args(),
         ],
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
@@ -217,86 +350,7 @@ def run_batch(
         pass
 
     result = BatchResult()
-
-    if show_progress:
-        progress = Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            MofNCompleteColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>5.1f}%"),
-            _CasesPerSecondColumn(),
-            TimeElapsedColumn(),
-            TimeRemainingColumn(),
-            transient=False,
-        )
-        progress_ctx: Any = progress
-    else:
-        progress = None
-        progress_ctx = nullcontext()
-
-    with progress_ctx:
-        task_id = None
-        if progress is not None:
-            task_id = progress.add_task("Preparing solver…", total=None, start=False)
-
-        for raw in proc.stdout:
-            line = raw.strip()
-            if not line:
-                continue
-            try:
-                msg = json.loads(line)
-            except json.JSONDecodeError:
-                result.errors.append(f"Malformed JSON from worker: {line!r}")
-                continue
-
-            if on_message is not None:
-                on_message(msg)
-
-            mtype = msg.get("type")
-            mval = msg.get("value")
-
-            if mtype == "moveWeights":
-                # Bridge converts JS Map -> list of [k, v] pairs.
-                if isinstance(mval, list):
-                    result.move_weights = {k: v for k, v in mval}
-            elif mtype == "num-states":
-                if isinstance(mval, int):
-                    result.num_states = mval
-                    if progress is not None and task_id is not None:
-                        progress.update(
-                            task_id,
-                            total=mval,
-                            description=f"Solving {mval} cases",
-                        )
-                        progress.start_task(task_id)
-                else:
-                    result.bfs_progress.append(str(mval))
-                    if progress is not None and task_id is not None:
-                        progress.update(
-                            task_id,
-                            description=f"BFS: {mval}",
-                        )
-            elif mtype == "next-state":
-                result.cases.append(CaseResult(
-                    index=int(mval["index"]),
-                    case_num=int(mval["num"]),
-                    setup=str(mval["setup"]),
-                ))
-                if progress is not None and task_id is not None:
-                    progress.update(task_id, advance=1)
-            elif mtype == "solution":
-                if result.cases:
-                    result.cases[-1].solutions.append(str(mval))
-                else:
-                    result.errors.append(f"Stray solution before next-state: {mval!r}")
-            elif mtype == "stop":
-                if mval is None:
-                    # Terminal stop — consume any remaining output then break.
-                    break
-                result.errors.append(str(mval))
-            # depthUpdate / set-depth / debug are ignored here but still delivered
-            # to on_message for callers that want them.
+    _collect_messages(_parse_lines(proc.stdout, result), result, on_message, show_progress)
 
     stderr_data = proc.stderr.read() or ""
     return_code = proc.wait()
@@ -308,16 +362,291 @@ def run_batch(
             msg = "Worker errors: " + " | ".join(result.errors) + "\n" + msg
         raise BatchSolverError(msg)
 
-    if result.errors:
-        raise BatchSolverError("Worker reported errors: " + " | ".join(result.errors))
+    return _check_result(result)
 
-    if result.num_states is not None and result.num_states != len(result.cases):
-        raise BatchSolverError(
-            f"Case count mismatch: worker reported num_states={result.num_states} "
-            f"but received {len(result.cases)} next-state messages."
+
+def _case_selection(case_nums: list[int]) -> str:
+    """``#`` suffix of the worker's Scramble field selecting exactly ``case_nums``."""
+    parts = []
+    start = prev = None
+    for num in sorted(case_nums):
+        if prev is not None and num == prev + 1:
+            prev = num
+            continue
+        if start is not None:
+            parts.append(f"{start}-{prev}" if prev > start else str(start))
+        start = prev = num
+    if start is not None:
+        parts.append(f"{start}-{prev}" if prev > start else str(start))
+    return "#" + ",".join(parts)
+
+
+def run_batch_parallel(
+    inp: BatchInput,
+    *,
+    workers: Optional[int] = None,
+    node_path: Path = Path("node"),
+    on_message: Optional[MessageCallback] = None,
+    show_progress: bool = True,
+    max_old_space_size_mb: int = 1024 * 1024,
+) -> BatchResult:
+    """Like :func:`run_batch`, but solves the cases in ``workers`` Node
+    processes at once (default: one per CPU).
+
+    A quick first run without subgroups lists the cases the worker would
+    solve, after its deduplication, sorting and ``#`` case selection. Every
+    shard then gets the full input with a ``#`` selection of every
+    ``workers``-th of those cases, so case numbers match a single run; the
+    cases are merged back in order and re-indexed.
+
+    Every process builds its own pruning tables, so memory use grows with
+    ``workers``. ``on_message`` gets the total ``num-states`` once, then the
+    messages of all shards (except their own ``num-states``) as they arrive,
+    interleaved between shards.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    probe = run_batch(
+        dataclasses.replace(inp, subgroups=[]),
+        node_path=node_path,
+        show_progress=False,
+        max_old_space_size_mb=max_old_space_size_mb,
+    )
+    case_nums = [case.case_num for case in probe.cases]
+    workers = max(1, min(workers, len(case_nums)))
+    if workers == 1:
+        return run_batch(
+            inp,
+            node_path=node_path,
+            on_message=on_message,
+            show_progress=show_progress,
+            max_old_space_size_mb=max_old_space_size_mb,
         )
 
-    return result
+    if on_message is not None:
+        on_message({"type": "num-states", "value": probe.num_states})
+    solve = inp.solve.split("#")[0]
+    shards = [
+        dataclasses.replace(inp, solve=solve + _case_selection(case_nums[i::workers]))
+        for i in range(workers)
+    ]
+
+    lock = threading.Lock()
+    progress = _make_progress() if show_progress else None
+    task_id = None
+    if progress is not None:
+        task_id = progress.add_task(f"Solving {len(case_nums)} cases in {workers} processes", total=len(case_nums))
+
+    def forward(msg: dict[str, Any]) -> None:
+        with lock:
+            if progress is not None and task_id is not None and msg.get("type") == "next-state":
+                progress.update(task_id, advance=1)
+            if on_message is not None and msg.get("type") != "num-states":
+                on_message(msg)
+
+    with progress if progress is not None else nullcontext():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    run_batch,
+                    shard,
+                    node_path=node_path,
+                    on_message=forward,
+                    show_progress=False,
+                    max_old_space_size_mb=max_old_space_size_mb,
+                )
+                for shard in shards
+            ]
+            shard_results = [future.result() for future in futures]
+
+    result = BatchResult(num_states=probe.num_states, move_weights=shard_results[0].move_weights)
+    for shard_result in shard_results:
+        result.cases += shard_result.cases
+        result.bfs_progress += shard_result.bfs_progress
+    result.cases.sort(key=lambda case: case.case_num)
+    for index, case in enumerate(result.cases, start=1):
+        case.index = index
+    return _check_result(result)
+
+
+class SolverSession:
+    """A long-lived solver server (``serve_worker.js``) that solves many batches.
+
+    Pruning tables stay in the server between batches, so solving the same
+    puzzle, subgroup and prune depth again (e.g. generating missing cases or
+    fixing single cases) skips rebuilding them::
+
+        with SolverSession() as session:
+            first = session.run(inp)
+            again = run_batch(other_inp, session=session)
+
+    Batches are solved one at a time; a session is not meant to be shared
+    between threads.
+    """
+
+    def __init__(
+        self,
+        node_path: Path = Path("node"),
+        max_old_space_size_mb: int = 1024 * 1024,
+        max_tables: int = 8,
+    ) -> None:
+        self.node_path = Path(node_path)
+        self.max_old_space_size_mb = max_old_space_size_mb
+        self.max_tables = max_tables
+        self.proc: Optional[subprocess.Popen] = None
+        self.next_id = 1
+        # Last lines the server wrote to stderr, for error messages
+        self.stderr_tail: deque[str] = deque(maxlen=50)
+
+    def __enter__(self) -> "SolverSession":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self.proc is not None:
+            return
+        if not _SERVER_JS.exists():
+            raise FileNotFoundError(f"Node server not found at {_SERVER_JS}")
+        self.proc = subprocess.Popen(
+            [
+                self.node_path.as_posix(),
+                f"--max-old-space-size={self.max_old_space_size_mb}",
+                str(_SERVER_JS),
+                f"--max-tables={self.max_tables}",
+                *bridge_args(),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=str(_SERVER_JS.parent),
+            text=True,
+            encoding="utf-8",
+        )
+        threading.Thread(target=self._drain_stderr, args=(self.proc.stderr,), daemon=True).start()
+
+    def _drain_stderr(self, stderr) -> None:
+        for line in stderr:
+            self.stderr_tail.append(line)
+
+    def _request(self, request: dict[str, Any]) -> int:
+        self.start()
+        assert self.proc is not None and self.proc.stdin is not None
+        request_id = self.next_id
+        self.next_id += 1
+        try:
+            self.proc.stdin.write(json.dumps({"id": request_id, **request}) + "\n")
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            raise self._server_error() from None
+        return request_id
+
+    def _responses(self, request_id: int, result: BatchResult, done: list) -> Iterator[dict[str, Any]]:
+        assert self.proc is not None
+        for msg in _parse_lines(self.proc.stdout, result):
+            if msg.pop("id", None) != request_id:
+                # Left over from an earlier request that was abandoned halfway
+                continue
+            if msg.get("type") == "done":
+                done.append(msg.get("value"))
+                return
+            yield msg
+
+    def _server_error(self) -> BatchSolverError:
+        assert self.proc is not None
+        return_code = self.proc.wait()
+        self.proc = None
+        detail = "".join(self.stderr_tail).strip() or "(no stderr)"
+        return BatchSolverError(f"Node solver server exited with code {return_code}: {detail}")
+
+    def run(
+        self,
+        inp: BatchInput,
+        *,
+        on_message: Optional[MessageCallback] = None,
+        show_progress: bool = True,
+    ) -> BatchResult:
+        """Solve one batch, see :func:`run_batch`."""
+        request_id = self._request({"input": inp.to_worker_dict()})
+        result = BatchResult()
+        done: list = []
+        responses = self._responses(request_id, result, done)
+        try:
+            _collect_messages(responses, result, on_message, show_progress)
+        except Exception:
+            # on_message failed: let the server finish the batch, so the next one starts clean
+            for _ in responses:
+                pass
+            raise
+        except BaseException:
+            # Interrupted: don't wait for the rest of the batch, restart the server next time
+            self.kill()
+            raise
+        # Skip whatever the worker wrote after its terminal stop
+        for _ in responses:
+            pass
+        if not done:
+            raise self._server_error()
+        if done[0] is not None:
+            result.errors.append(str(done[0]))
+        return _check_result(result)
+
+    def solve_cases(
+        self,
+        inp: BatchInput,
+        setups: list[str],
+        *,
+        show_progress: bool = True,
+    ) -> list[list[str]]:
+        """Solutions of every setup, solved one request each with the settings of ``inp``.
+
+        The pruning tables are built for the first setup and reused for the rest, and unlike one
+        batch of all setups, duplicate and solved setups keep their own (possibly empty) entry.
+        Meant for fixing or filling in single cases of a solved batch."""
+        solutions: list[list[str]] = []
+        progress = _make_progress() if show_progress else None
+        with progress if progress is not None else nullcontext():
+            task_id = progress.add_task("Solving cases", total=len(setups)) if progress is not None else None
+            for setup in setups:
+                result = self.run(dataclasses.replace(inp, solve=f"[\n{setup}\n]"), show_progress=False)
+                solutions.append(result.cases[0].solutions if result.cases else [])
+                if progress is not None and task_id is not None:
+                    progress.update(task_id, advance=1)
+        return solutions
+
+    def clear(self) -> None:
+        """Drop the pruning tables kept by the server."""
+        request_id = self._request({"command": "clear"})
+        done: list = []
+        for _ in self._responses(request_id, BatchResult(), done):
+            pass
+        if not done:
+            raise self._server_error()
+
+    def kill(self) -> None:
+        """Stop the server at once, dropping the batch it is solving."""
+        if self.proc is None:
+            return
+        self.proc.kill()
+        self.proc.wait()
+        self.proc = None
+
+    def close(self) -> None:
+        if self.proc is None:
+            return
+        assert self.proc.stdin is not None
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
 
 
 app = typer.Typer(
@@ -354,6 +683,10 @@ def solve(
         False, "--verbose",
         help="Also print per-message worker output to stderr.",
     ),
+    threads: int = typer.Option(
+        1, "--threads",
+        help="Worker threads solving cases in the Node process, sharing one copy of the pruning tables.",
+    ),
 ) -> None:
     """Solve a batch using worker.js and write the result as JSON."""
     if stdin == (input is not None):
@@ -378,6 +711,7 @@ def solve(
             node_path=node_path,
             on_message=_log if verbose else None,
             show_progress=progress,
+            threads=threads,
         )
     except BatchSolverError as e:
         typer.echo(f"BatchSolverError: {e}", err=True)
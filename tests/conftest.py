@@ -0,0 +1,31 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+DATA = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """Keep the on-disk caches of the test run out of the user's cache directory."""
+    path = tmp_path_factory.mktemp("cache")
+    previous = os.environ.get("CUBEVIS_CACHE_DIR")
+    os.environ["CUBEVIS_CACHE_DIR"] = str(path)
+    yield path
+    if previous is None:
+        del os.environ["CUBEVIS_CACHE_DIR"]
+    else:
+        os.environ["CUBEVIS_CACHE_DIR"] = previous
+
+
+@pytest.fixture(scope="session")
+def colorizer_baseline():
+    """Outputs recorded from the pure Python implementation the NumPy cube replaced.
+
+    For every colorizer and alg: sha256 of the scramble and inverse svgs and of
+    the scrambled ``pieces`` dict, the inverse alg and the reference rotation
+    after scrambling, each measured from a fresh colorizer.
+    """
+    return json.loads((DATA / "colorizer_baseline.json").read_text(encoding="utf-8"))
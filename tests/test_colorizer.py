@@ -0,0 +1,134 @@
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cubevis.colorizer.utils import get_colorizer, render_variants, variant_states
+
+
+def digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def reference_sticker_colors(colorizer):
+    """Sticker colors of the colorizer's cube, resolved piece by piece as before the precompiled table."""
+    colors = {}
+    face_to_color = colorizer.get_face_to_color()
+    override_pieces = colorizer.get_override_pieces()
+    for position, (piece, ori) in colorizer.cube.pieces.items():
+        non_numeric_piece = "".join([c for c in piece if not c.isnumeric()])
+        last_digit = piece[-1] if piece[-1].isnumeric() else ""
+        piece_stickers = colorizer.make_stickers_from_piece(non_numeric_piece)
+        sticker_positions = colorizer.make_stickers_from_piece(position)
+        for i in range(len(non_numeric_piece)):
+            # The old loop skipped every sticker it couldn't resolve
+            try:
+                sticker = sticker_positions[(i + ori) % len(non_numeric_piece)]
+                if last_digit != "" and piece_stickers[i] + last_digit in override_pieces:
+                    colors[sticker] = override_pieces[piece_stickers[i] + last_digit]
+                elif piece_stickers[i] in override_pieces:
+                    colors[sticker] = override_pieces[piece_stickers[i]]
+                else:
+                    colors[sticker] = face_to_color[non_numeric_piece[i]]
+            except (IndexError, KeyError):
+                pass
+    colors.update(colorizer.get_override_colors())
+    return colors
+
+
+def test_svgs_match_baseline(colorizer_baseline):
+    for name, cases in colorizer_baseline.items():
+        for case in cases:
+            colorizer = get_colorizer(name)
+            assert digest(colorizer.scramble(case["alg"])) == case["scramble_svg"], (name, case["alg"])
+            if case["inverse"].startswith("error "):
+                continue
+            assert colorizer.inverse(case["alg"]) == case["inverse"], (name, case["alg"])
+            assert digest(colorizer.create_svg()) == case["inverse_svg"], (name, case["alg"])
+
+
+def test_sticker_colors_match_reference(colorizer_baseline):
+    for name, cases in colorizer_baseline.items():
+        colorizer = get_colorizer(name)
+        for case in cases:
+            colorizer.scramble(case["alg"])
+            assert colorizer.get_sticker_colors_from_cube() == reference_sticker_colors(colorizer), (name, case["alg"])
+
+
+def test_render_of_state_for_matches_baseline(colorizer_baseline):
+    for name, cases in colorizer_baseline.items():
+        colorizer = get_colorizer(name)
+        for case in cases:
+            state = colorizer.state_for(case["alg"])
+            assert digest(colorizer.render(state)) == case["scramble_svg"], (name, case["alg"])
+            if not case["inverse"].startswith("error "):
+                state = colorizer.state_for(case["alg"], inverse=True)
+                assert digest(colorizer.render(state)) == case["inverse_svg"], (name, case["alg"])
+
+
+def test_render_from_threads(colorizer_baseline):
+    for name in ("3x3-OLL", "Megaminx-LL", "FTO-LL", "Square-1"):
+        cases = colorizer_baseline[name]
+        # A fresh colorizer, so the threads race to build the compiled tables
+        colorizer = get_colorizer(name)
+        colorizer.render_cache_size = 0
+        states = [colorizer.state_for(case["alg"]) for case in cases] * 20
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            svgs = list(executor.map(colorizer.render, states))
+        assert [digest(svg) for svg in svgs] == [case["scramble_svg"] for case in cases] * 20
+
+
+def test_variants_render_like_each_colorizer():
+    names = ["3x3", "3x3-OLL", "3x3-LL", "3x3-CMLL", "2x2"]
+    alg = "R U R' U R U2 R'"
+    colorizers = [get_colorizer(name) for name in names]
+    states = variant_states(colorizers, alg)
+    # Colorizers that only differ in colors get the same state object
+    assert states[0] is states[1]
+    assert states[2] is states[3]
+    assert len({id(state) for state in states}) == 3
+    svgs = render_variants(colorizers, alg)
+    for colorizer, state, svg in zip(colorizers, states, svgs):
+        assert state == colorizer.state_for(alg, inverse=True)
+        assert svg == colorizer.render(colorizer.state_for(alg, inverse=True))
+
+
+@pytest.mark.parametrize("name", ["3x3-OLL", "Megaminx-ZBLS", "5x5-Hoya"])
+def test_shared_geometry_is_read_only(name):
+    first, second = get_colorizer(name), get_colorizer(name)
+    polygons = first.get_polygons()
+    assert polygons is second.get_polygons()
+    assert first.vertices is second.vertices
+    sticker, picking = next(iter(polygons.items()))
+    with pytest.raises(TypeError):
+        polygons[sticker] = [0, 1, 2]
+    with pytest.raises(ValueError):
+        picking[0] = 0
+    with pytest.raises(ValueError):
+        first.vertices[0, 0] = 0
+
+
+@pytest.mark.parametrize("name", ["3x3-OLL", "Megaminx-LL", "Square-1"])
+def test_optimized_svg_merges_stickers_by_color(colorizer_baseline, name):
+    colorizer = get_colorizer(name)
+    for case in colorizer_baseline[name]:
+        state = colorizer.state_for(case["alg"])
+        fills = re.findall(r"<polygon fill='([^']*)'", colorizer.render(state))
+        optimized = colorizer.render_optimized(state)
+        paths = re.findall(r"<path fill='([^']*)' d='([^']*)'/>", optimized)
+        assert sorted(fill for fill, _ in paths) == sorted(set(fills))
+        assert sum(outline.count("M") for _, outline in paths) == len(fills)
+        assert all(re.fullmatch(r"(M-?\d+( -?\d+)*Z)+", outline) for _, outline in paths)
+        assert "<style>" in optimized
+        assert "<style>" not in colorizer.render_optimized(state, inline_style=False)
+
+
+def test_render_memo_keeps_the_most_recently_used():
+    colorizer = get_colorizer("3x3-OLL")
+    colorizer.render_cache_size = 2
+    first, second, third = (colorizer.state_for(alg, inverse=True) for alg in ["R U R' U R U2 R'", "F R U R' U' F'", "R U2 R' U' R U' R'"])
+    svgs = [colorizer.render(state) for state in (first, second, first, third)]
+    assert list(colorizer.render_cache.values()) == [svgs[0], svgs[3]]
+    # Cases past the first render_cache_size are still memoized
+    assert colorizer.render(third) is svgs[3]
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from cubevis.colorizer.utils import get_colorizer
+from cubevis.scripts.combined import CombinedWriter
+
+ALGS = ["R U R' U R U2 R'", "R U2 R' U' R U' R'", "F R U R' U' F'", "F R U R' U' F'", "", "r U R' U R U2 r'"]
+
+
+@pytest.fixture(scope="module")
+def oll_cases():
+    colorizer = get_colorizer("3x3-OLL")
+    states = [colorizer.state_for(alg, inverse=True) for alg in ALGS]
+    return colorizer, {str(i): state for i, state in enumerate(states, start=1)}
+
+
+def write(path, combined_format, colorizer, cases):
+    with CombinedWriter(path, combined_format, colorizer.svg_geometry()) as writer:
+        for case_id, state in cases.items():
+            writer.add(case_id, colorizer.render(state), colorizer.color_string(state))
+    return json.loads(path.read_text())
+
+
+def test_legacy_holds_every_svg(tmp_path, oll_cases):
+    colorizer, cases = oll_cases
+    combined = write(tmp_path / "combined.json", "legacy", colorizer, cases)
+    assert combined == {case_id: colorizer.render(state) for case_id, state in cases.items()}
+
+
+def test_deduped_round_trips(tmp_path, oll_cases):
+    colorizer, cases = oll_cases
+    combined = write(tmp_path / "combined.json", "deduped", colorizer, cases)
+    assert combined["format"] == "deduped"
+    # Cases 3 and 4 are the same picture
+    assert len(combined["svgs"]) == len(cases) - 1
+    expanded = {case_id: combined["svgs"][digest] for case_id, digest in combined["cases"].items()}
+    assert expanded == {case_id: colorizer.render(state) for case_id, state in cases.items()}
+
+
+def test_writer_output_is_json_dump(tmp_path, oll_cases):
+    colorizer, cases = oll_cases
+    combined = write(tmp_path / "combined.json", "deduped", colorizer, cases)
+    assert (tmp_path / "combined.json").read_text() == json.dumps(combined)
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CombinedWriter(tmp_path / "combined.json", "gzip")
@@ -0,0 +1,92 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+from jinja2 import Environment, PackageLoader
+
+from cubevis.colorizer.colorizer import BaseColorizer, color_chars
+from cubevis.colorizer.utils import get_colorizer
+from cubevis.scripts.combined import CombinedWriter
+from cubevis.scripts.full_pipeline import add_combined_loader_script, write_combined_loader
+from cubevis.scripts.images import gen_images
+
+ALGS = ["R U R' U R U2 R'", "R U2 R' U' R U' R'", "F R U R' U' F'", "r U R' U R U2 r'"]
+
+LOAD_ALL = """
+const fs = require("fs");
+const vm = require("vm");
+const files = JSON.parse(process.argv[process.argv.length - 1]);
+const window = global.window = {};
+window.fetch = global.fetch = async (url) => ({
+    ok: true, status: 200, statusText: "OK",
+    json: async () => JSON.parse(fs.readFileSync(files[url], "utf8")),
+});
+const nativeFetch = window.fetch;
+vm.runInThisContext(fs.readFileSync(files.loader, "utf8"));
+(async () => {
+    const out = { fetchUntouched: window.fetch === nativeFetch };
+    for (const name of ["legacy", "deduped", "compact"]) {
+        out[name] = await loadCombined(name);
+    }
+    process.stdout.write(JSON.stringify(out));
+})();
+"""
+
+
+def write_format(path, combined_format, colorizer, states):
+    with CombinedWriter(path, combined_format, colorizer.svg_geometry()) as writer:
+        for case_id, state in states.items():
+            writer.add(case_id, colorizer.render(state), colorizer.color_string(state))
+    return json.loads(path.read_text())
+
+
+def test_compact_color_strings_render_the_same_svgs(tmp_path):
+    colorizer = get_colorizer("Megaminx-LL")
+    states = {str(i): colorizer.state_for(alg, inverse=True) for i, alg in enumerate(["R U R' U R U2 R'", "R U R' U'"])}
+    combined = write_format(tmp_path / "combined.json", "compact", colorizer, states)
+    assert combined["geometry"] == colorizer.svg_geometry()
+    for case_id, state in states.items():
+        colors = [color_chars.index(char) if char != "." else -1 for char in combined["cases"][case_id]]
+        assert colorizer.render_colors(colors) == colorizer.render(state)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs Node.js")
+def test_loader_expands_every_format(tmp_path):
+    colorizer = get_colorizer("3x3-OLL")
+    states = {str(i): colorizer.state_for(alg, inverse=True) for i, alg in enumerate(ALGS, start=1)}
+    files = {}
+    for combined_format in ("legacy", "deduped", "compact"):
+        files[combined_format] = str(tmp_path / f"{combined_format}.json")
+        write_format(tmp_path / f"{combined_format}.json", combined_format, colorizer, states)
+    write_combined_loader(tmp_path, "3x3", "OLL")
+    files["loader"] = str(tmp_path / "combined.js")
+    run = subprocess.run(["node", "-e", LOAD_ALL, json.dumps(files)], capture_output=True, text=True)
+    assert run.returncode == 0, run.stderr
+    out = json.loads(run.stdout)
+    expected = {case_id: colorizer.render(state) for case_id, state in states.items()}
+    assert out == {"fetchUntouched": True, "legacy": expected, "deduped": expected, "compact": expected}
+
+
+def test_old_index_html_gets_the_loader(tmp_path):
+    env = Environment(loader=PackageLoader("cubevis.scripts"))
+    index = env.get_template("index.html.jinja").render(puzzle="3x3", algset="OLL")
+    old = index.replace('\t<script src="combined.js"></script>\n', "")
+    assert 'combined.js' not in old
+    (tmp_path / "index.html").write_text(old)
+    assert add_combined_loader_script(tmp_path / "index.html")
+    migrated = (tmp_path / "index.html").read_text()
+    assert migrated.index('src="combined.js"') < migrated.index('src="../src/main.js"')
+    assert not add_combined_loader_script(tmp_path / "index.html")
+
+
+@pytest.mark.parametrize("combined_format", ["legacy", "deduped"])
+def test_color_strings_only_for_compact(tmp_path, monkeypatch, combined_format):
+    def too_many_colors(self, state):
+        raise ValueError("Palette of 63 colors is too large for color strings")
+
+    monkeypatch.setattr(BaseColorizer, "color_string", too_many_colors)
+    csv = tmp_path / "oll.csv"
+    csv.write_text("Algset,Name,Algs\n" + "".join(f'OLL,{i},"{alg}"\n' for i, alg in enumerate(ALGS)))
+    gen_images("3x3-OLL", csv, tmp_path / "pictures", combined_format=combined_format)
+    assert len(json.loads((tmp_path / "combined.json").read_text())) > 0
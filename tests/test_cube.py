@@ -0,0 +1,167 @@
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+from cubevis.colorizer.utils import get_colorizer
+from cubevis.cube import Cube, CubeState, Megaminx, SquareOne, ThreeByThree, tokenize_alg
+
+
+def digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def same_state(first, second):
+    return all(np.array_equal(a, b) for a, b in zip(first, second))
+
+
+def test_states_match_baseline(colorizer_baseline):
+    for name, cases in colorizer_baseline.items():
+        for case in cases:
+            colorizer = get_colorizer(name)
+            colorizer.scramble(case["alg"])
+            pieces = {loc: [piece, int(ori)] for loc, (piece, ori) in colorizer.cube.pieces.items()}
+            assert digest(json.dumps(pieces, sort_keys=True)) == case["pieces"], (name, case["alg"])
+
+
+@pytest.mark.parametrize("cube_class", [ThreeByThree, Megaminx])
+def test_piece_dict_round_trips(cube_class):
+    cube = cube_class()
+    cube.scramble("R U R' U' F2 D")
+    pieces = cube.pieces
+    state = cube.get_state()
+    cube.reset()
+    cube.pieces = pieces
+    assert same_state(cube.get_state(), state)
+    assert not cube.is_solved()
+    cube.reset()
+    assert cube.is_solved()
+
+
+def test_tokenize_alg():
+    assert tokenize_alg("R2' U") == (("R", -2), ("U", 1))
+    assert tokenize_alg("Rw' x2 2R U3'") == (("Rw", -1), ("x", 2), ("2R", 1), ("U", -3))
+    assert tokenize_alg("") == ()
+
+
+@pytest.mark.parametrize("cube_class", [ThreeByThree, Megaminx])
+def test_move_powers_match_repeated_moves(cube_class):
+    cube = cube_class()
+    for move_name, powers in cube.move_powers.items():
+        assert len(powers) == cube.max_cycles[move_name]
+        for power, transform in enumerate(powers):
+            cube.reset()
+            for _ in range(power):
+                cube.apply_move(move_name)
+            expected = cube.get_state()
+            cube.reset()
+            cube.apply_transform(transform)
+            assert same_state(cube.get_state(), expected), (move_name, power)
+
+
+def test_move_counts_are_powers():
+    cube = ThreeByThree()
+    for alg, repeated in [("R2", "R R"), ("R'", "R R R"), ("U2'", "U2"), ("F3", "F'"), ("D4 B", "B")]:
+        cube.scramble(alg)
+        state = cube.get_state()
+        cube.scramble(repeated)
+        assert same_state(cube.get_state(), state), alg
+
+
+def test_compiled_algs_match_move_by_move():
+    cube = ThreeByThree()
+    alg = "R U R' F2 D' L2 B U2 x y'"
+    cube.reset()
+    for move_name, count in tokenize_alg(alg):
+        for _ in range(count % cube.max_cycles[move_name]):
+            cube.apply_move(move_name)
+    expected = cube.get_state()
+    cube.reset()
+    cube.apply_alg(alg)
+    assert same_state(cube.get_state(), expected)
+    cube.apply_alg(alg, inverse=True)
+    assert cube.is_solved()
+    # Identity powers are dropped before the cache lookup
+    assert cube.compile_alg(alg) is cube.compile_alg(alg + " U4")
+    assert cube.compile_alg(alg, inverse=True) is not cube.compile_alg(alg)
+
+
+@pytest.mark.parametrize("cube_class", Cube.__subclasses__(), ids=lambda cls: cls.__name__)
+def test_move_orders_match_repeated_moves(cube_class):
+    cube = cube_class()
+    for move_name in cube.moves:
+        cube.reset()
+        order = 0
+        while order == 0 or not cube.is_solved():
+            cube.apply_move(move_name)
+            order += 1
+        assert cube.move_order(move_name) == order, move_name
+
+
+def test_reference_rotations_match_baseline(colorizer_baseline):
+    for name, cases in colorizer_baseline.items():
+        for case in cases:
+            cube = get_colorizer(name).cube
+            cube.scramble(case["alg"])
+            before = cube.pieces
+            assert cube.to_reference_rotation() == case["reference_rotation"], (name, case["alg"])
+            assert cube.pieces == before
+
+
+@pytest.mark.parametrize("cube_class", [ThreeByThree, Megaminx, SquareOne])
+def test_apply_batch_matches_scramble(cube_class):
+    cube = cube_class()
+    if cube_class is SquareOne:
+        algs = ["/ (3,0) / (1,0) / (0,-3) / (-1,0)", "(1,0) / (-1,-1) / (0,1) /", ""]
+    else:
+        moves = [m for m in cube.max_cycles if m[0].isupper()]
+        algs = [" ".join(moves[(3 * i + k) % len(moves)] + ["", "'", "2"][k % 3] for k in range(i)) for i in range(12)]
+    perms, oris = cube.apply_batch(algs)
+    for alg, perm, ori in zip(algs, perms, oris):
+        cube.scramble(alg)
+        assert np.array_equal(cube.perm, perm), alg
+        assert np.array_equal(cube.ori, ori), alg
+
+
+def test_cubes_share_compiled_tables():
+    first, second = ThreeByThree(), ThreeByThree()
+    for name in Cube.shared_attributes:
+        assert getattr(first, name) is getattr(second, name), name
+    first.scramble("R U R'")
+    assert second.is_solved()
+    assert first.state is not second.state
+
+
+def test_cube_states_are_slotted_values():
+    cube = ThreeByThree()
+    cube.scramble("R U R' U'")
+    state = cube.get_state()
+    assert isinstance(state, CubeState) and not hasattr(state, "__dict__")
+    copy = state.copy()
+    assert copy == state and hash(copy) == hash(state)
+    assert copy.perm is not state.perm
+    perm, ori = state
+    assert perm is state.perm and ori is state.ori
+    cube.move("U")
+    assert cube.get_state() != state
+    assert len({state, copy, cube.get_state()}) == 2
+
+
+def test_power_tables_stay_memory_mapped():
+    mdefs = ThreeByThree().mdefs
+    Cube.shared_tables.pop(mdefs, None)
+    built = ThreeByThree()
+    Cube.shared_tables.pop(mdefs, None)
+    loaded = ThreeByThree()
+
+    _, perms, oris = loaded.stacked_powers
+    assert isinstance(perms, np.memmap) and isinstance(oris, np.memmap)
+    assert not perms.flags.writeable
+    # Move powers are views into the same mapped table, not private copies
+    assert np.shares_memory(loaded.move_powers["R"][1][0], perms)
+    assert np.array_equal(perms, built.stacked_powers[1])
+    assert np.array_equal(oris, built.stacked_powers[2])
+    built.scramble("R U R' F2 D")
+    loaded.scramble("R U R' F2 D")
+    assert built.state == loaded.state
@@ -0,0 +1,49 @@
+import pytest
+
+from cubevis.colorizer import get_colorizer
+from cubevis.cube import ThreeByThree
+from cubevis.fingerprint import Fingerprinter, find_duplicates
+
+SUNE = "R U R' U R U2 R'"
+U_PERM = "R2 U R U R' U' R' U' R' U R'"
+
+
+@pytest.fixture(scope="module")
+def oll():
+    colorizer = get_colorizer("3x3-OLL")
+    return Fingerprinter(colorizer.cube, colorizer.get_equivalences())
+
+
+def test_equivalent_setups_share_a_fingerprint(oll):
+    keys = oll.fingerprint_algs([SUNE, "F R U R' U' F'", SUNE + " " + U_PERM, U_PERM, SUNE + " U"])
+    assert find_duplicates(keys) == [(2, 0)]
+    # A U perm only moves pieces that are equivalent in OLL
+    assert keys[3] == oll.solved_key
+    assert keys[1] != oll.solved_key
+
+
+def test_find_duplicates_points_to_the_first_occurrence():
+    assert find_duplicates([b"a", b"b", b"a", b"a", b"c", b"b"]) == [(2, 0), (3, 0), (5, 1)]
+    assert find_duplicates([]) == []
+
+
+@pytest.mark.parametrize("equivalences", ["{UR UFR}", "{UR XY}", "{UR UL", "0: UR", "2: URF"])
+def test_invalid_equivalences_are_rejected(equivalences):
+    with pytest.raises(ValueError):
+        Fingerprinter(ThreeByThree(), equivalences)
+
+
+def test_adjusts_merge_the_setups_of_an_orbit(oll):
+    algs = [SUNE, "U " + SUNE, SUNE + " U", "U2 " + SUNE + " U'"]
+    assert len(set(oll.fingerprint_algs(algs))) > 1
+    keys = oll.fingerprint_algs(algs, "U", "U")
+    assert find_duplicates(keys) == [(1, 0), (2, 0), (3, 0)]
+    assert oll.fingerprint_algs(["U2"], "U", "U") == [oll.solved_key]
+
+
+def test_adjust_transforms_cover_every_combination(oll):
+    assert len(oll.adjust_transforms("")) == 1
+    assert len(oll.adjust_transforms("U")) == 4
+    assert len(oll.adjust_transforms("<U, D>")) == 16
+    with pytest.raises(ValueError):
+        oll.adjust_transforms("Q")
@@ -0,0 +1,80 @@
+import json
+import struct
+import tarfile
+import zipfile
+
+import pytest
+
+from cubevis.scripts import images as images_module
+from cubevis.scripts.images import gen_images
+from cubevis.scripts.output import ImageOutput
+
+ALGS = ["R U R' U R U2 R'", "R U2 R' U' R U' R'", "F R U R' U' F'", "r U R' U R U2 r'", "F R U R' U' F'"]
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "oll.csv"
+    path.write_text("Algset,Name,Algs\n" + "".join(f'OLL,{i},"{alg}"\n' for i, alg in enumerate(ALGS)))
+    return path
+
+
+def pictures(root, output_mode, result):
+    if output_mode == "files":
+        return {path.name: path.read_text() for path in root.glob("*.svg")}
+    if output_mode == "zip":
+        with zipfile.ZipFile(root.with_suffix(".zip")) as archive:
+            return {name: archive.read(name).decode() for name in archive.namelist()}
+    if output_mode == "tar":
+        with tarfile.open(root.with_suffix(".tar")) as archive:
+            return {member.name: archive.extractfile(member).read().decode() for member in archive.getmembers()}
+    return result["images"]
+
+
+@pytest.mark.parametrize("output_mode", ["zip", "tar", "memory"])
+def test_output_modes_hold_the_same_pictures(tmp_path, csv, output_mode):
+    reference = tmp_path / "reference"
+    gen_images("3x3-OLL", csv, reference / "pictures")
+    expected = pictures(reference / "pictures", "files", None)
+    assert len(expected) == len(ALGS)
+
+    result = gen_images("3x3-OLL", csv, tmp_path / output_mode / "pictures", output_mode=output_mode)
+    assert pictures(tmp_path / output_mode / "pictures", output_mode, result) == expected
+    assert (tmp_path / output_mode / "combined.json").read_text() == (reference / "combined.json").read_text()
+
+
+@pytest.mark.parametrize("output_mode", ["zip", "tar"])
+def test_failure_leaves_no_partial_outputs(tmp_path, csv, monkeypatch, output_mode):
+    variant_states = images_module.variant_states
+    calls = []
+
+    def fail_on_third_case(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 3:
+            raise RuntimeError("broken case")
+        return variant_states(*args, **kwargs)
+
+    monkeypatch.setattr(images_module, "variant_states", fail_on_third_case)
+    root = tmp_path / "pictures"
+    with pytest.raises(RuntimeError, match="broken case"):
+        gen_images("3x3-OLL", csv, root, combined_format="deduped", variants=["3x3"], output_mode=output_mode)
+    assert not (tmp_path / "combined.json").exists()
+    assert not (tmp_path / "combined-3x3.json").exists()
+    assert not root.with_suffix("." + output_mode).exists()
+
+
+def test_image_output_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        ImageOutput(tmp_path)
+
+
+def test_atlases_cover_every_case_and_variant(tmp_path, csv):
+    gen_images("3x3-OLL", csv, tmp_path / "pictures", variants=["3x3"], atlas_size=32)
+    for name in ("atlas", "atlas-3x3"):
+        offsets = json.loads((tmp_path / f"{name}.json").read_text())
+        assert sorted(offsets, key=int) == [str(i) for i in range(1, len(ALGS) + 1)]
+        # The repeated alg shares its tile
+        assert offsets["3"] == offsets["5"]
+        png = (tmp_path / f"{name}.png").read_bytes()
+        width, height = struct.unpack(">II", png[16:24])
+        assert all(x + w <= width and y + h <= height for x, y, w, h in offsets.values())
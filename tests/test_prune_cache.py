@@ -0,0 +1,119 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from cubevis.solver import prune_cache
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs Node.js")
+
+SOLVER_DIR = Path(prune_cache.__file__).parent
+
+# Reads and writes a few bytes at a time, so sizes around the chunk size take
+# the same paths as tables around the real 1 GiB chunks
+CHUNKED_IO = """
+const fs = require("fs");
+const path = require("path");
+const args = JSON.parse(process.argv[process.argv.length - 1]);
+const { readFully, writeFully } = require(path.join(args.solver, "prune_cache.js"));
+const chunk = args.chunk;
+const fd = fs.openSync(path.join(args.dir, "io.bin"), "w+");
+const out = {};
+let position = 3;
+for (const size of args.sizes) {
+    const bytes = new Uint8Array(size).map((_, i) => (i * 31 + size) & 255);
+    writeFully(fd, bytes, position, chunk);
+    const back = new Uint8Array(new SharedArrayBuffer(size));
+    out[size] = readFully(fd, back, position, chunk) && back.every((b, i) => b === bytes[i]);
+    position += size;
+}
+out.pastEnd = readFully(fd, new Uint8Array(chunk + 1), position - chunk, chunk);
+fs.closeSync(fd);
+process.stdout.write(JSON.stringify(out));
+"""
+
+# Tables with uint16 keys and codes, written, read back and looked up
+ROUND_TRIP = """
+const fs = require("fs");
+const path = require("path");
+const args = JSON.parse(process.argv[process.argv.length - 1]);
+const { readTable, writeTable } = require(path.join(args.solver, "prune_cache.js"));
+const { SharedPruneTable } = require(path.join(args.solver, "shared_prune_table.js"));
+const entries = [];
+for (let i = 0; i < args.size; i++) {
+    entries.push([String.fromCharCode(i % 300, 7, Math.floor(i / 300)), i % 400 + 0.5]);
+}
+const file = path.join(args.dir, "table.prun");
+writeTable(file, SharedPruneTable.fromMap(new Map(entries)), 9);
+const cached = readTable(file);
+writeTable(path.join(args.dir, "too_big.prun"), cached.table, 9, 64);
+process.stdout.write(JSON.stringify({
+    depth: cached.depth,
+    size: cached.table.size,
+    found: entries.every(([key, value]) => cached.table.get(key) === value),
+    missing: [cached.table.get(String.fromCharCode(1, 8, 0)), cached.table.get("ab")],
+    tooBigWritten: fs.existsSync(path.join(args.dir, "too_big.prun")),
+}));
+"""
+
+# Writes three tables under a budget that fits two of them
+EVICTION = """
+const fs = require("fs");
+const path = require("path");
+const args = JSON.parse(process.argv[process.argv.length - 1]);
+const { writeTable } = require(path.join(args.solver, "prune_cache.js"));
+const { SharedPruneTable } = require(path.join(args.solver, "shared_prune_table.js"));
+const table = SharedPruneTable.fromMap(new Map([["abc", 1], ["abd", 2]]));
+const write = (name) => writeTable(path.join(args.dir, name + ".prun"), table, 2, args.budget);
+write("old");
+write("used");
+fs.utimesSync(path.join(args.dir, "old.prun"), 1000, 1000);
+fs.utimesSync(path.join(args.dir, "used.prun"), 2000, 2000);
+write("new");
+process.stdout.write(JSON.stringify(fs.readdirSync(args.dir).sort()));
+"""
+
+
+def run_node(script, **args):
+    args["solver"] = str(SOLVER_DIR)
+    run = subprocess.run(["node", "-e", script, json.dumps(args)], capture_output=True, text=True)
+    assert run.returncode == 0, run.stderr
+    return json.loads(run.stdout)
+
+
+def test_chunked_io_around_the_chunk_size(tmp_path):
+    sizes = [0, 1, 6, 7, 8, 13, 14, 15, 3 * 7 + 5]
+    out = run_node(CHUNKED_IO, dir=str(tmp_path), chunk=7, sizes=sizes)
+    assert out == {**{str(size): True for size in sizes}, "pastEnd": False}
+
+
+def test_tables_round_trip(tmp_path, monkeypatch):
+    out = run_node(ROUND_TRIP, dir=str(tmp_path), size=1000)
+    assert out == {"depth": 9, "size": 1000, "found": True, "missing": [None, None], "tooBigWritten": False}
+    monkeypatch.setattr(prune_cache, "prune_cache_dir", lambda: tmp_path)
+    [entry] = prune_cache.list_tables()
+    assert (entry.positions, entry.depth) == (1000, 9)
+
+
+def test_writing_evicts_least_recently_used(tmp_path):
+    run_node(EVICTION, dir=str(tmp_path), budget=10 ** 9)
+    table_bytes = (tmp_path / "new.prun").stat().st_size
+    for path in tmp_path.iterdir():
+        path.unlink()
+    assert run_node(EVICTION, dir=str(tmp_path), budget=2 * table_bytes) == ["new.prun", "used.prun"]
+
+
+def test_bridge_args_carry_the_budget(monkeypatch):
+    monkeypatch.setenv("CUBEVIS_PRUNE_CACHE_MAX_BYTES", "12345")
+    assert bridge_arg_values() == {"--prune-cache": str(prune_cache.prune_cache_dir()), "--prune-cache-max-bytes": "12345"}
+    monkeypatch.delenv("CUBEVIS_PRUNE_CACHE_MAX_BYTES")
+    assert bridge_arg_values()["--prune-cache-max-bytes"] == str(prune_cache.DEFAULT_MAX_CACHE_BYTES)
+    monkeypatch.setenv("CUBEVIS_NO_CACHE", "1")
+    assert prune_cache.bridge_args() == []
+
+
+def bridge_arg_values():
+    return dict(arg.split("=", 1) for arg in prune_cache.bridge_args())
+
@@ -0,0 +1,84 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from cubevis.colorizer import get_colorizer
+from cubevis.colorizer.raster import Rasterizer, encode_png, parse_color, polygon_masks
+from cubevis.scripts.atlas import SpriteAtlas
+
+
+def decode_png(data):
+    """Pixels of a PNG written by encode_png, checking every chunk on the way."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks = []
+    position = 8
+    while position < len(data):
+        (length,) = struct.unpack(">I", data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        (crc,) = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        chunks.append((kind, body))
+        position += 12 + length
+    assert [kind for kind, _ in chunks] == [b"IHDR", b"IDAT", b"IEND"]
+    width, height, depth, color_type, compression, filtering, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+    assert (depth, color_type, compression, filtering, interlace) == (8, 6, 0, 0, 0)
+    rows = np.frombuffer(zlib.decompress(chunks[1][1]), dtype=np.uint8).reshape(height, width * 4 + 1)
+    assert not rows[:, 0].any()
+    return rows[:, 1:].reshape(height, width, 4)
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 5), (17, 2)])
+def test_png_decodes_to_the_same_pixels(shape):
+    pixels = np.random.default_rng(0).integers(0, 256, size=(*shape, 4), dtype=np.uint8)
+    assert np.array_equal(decode_png(encode_png(pixels)), pixels)
+
+
+def test_atlas_shares_tiles_of_equal_cases():
+    colorizer = get_colorizer("3x3-OLL")
+    algs = {"a": "R U R' U R U2 R'", "b": "F R U R' U' F'", "c": "R U R' U R U2 R'", "d": "R U2 R' U' R U' R'"}
+    atlas = SpriteAtlas(colorizer, 24)
+    states = {case_id: colorizer.state_for(alg, inverse=True) for case_id, alg in algs.items()}
+    for case_id, state in states.items():
+        atlas.add(case_id, state)
+    image, offsets = atlas.pack()
+
+    assert len(atlas.tiles) == 3
+    assert offsets["a"] == offsets["c"]
+    rects = {tuple(rect) for rect in offsets.values()}
+    assert len(rects) == 3
+    for x, y, width, height in rects:
+        assert (width, height) == (atlas.rasterizer.width, atlas.rasterizer.height)
+        assert x + width <= image.shape[1] and y + height <= image.shape[0]
+    for case_id, (x, y, width, height) in offsets.items():
+        tile = atlas.rasterizer.render(states[case_id])
+        assert np.array_equal(image[y:y + height, x:x + width], tile)
+
+
+def test_polygons_are_filled_with_their_sticker_color():
+    colorizer = get_colorizer("3x3-OLL")
+    state = colorizer.state_for("R U R' U R U2 R'", inverse=True)
+    rasterizer = Rasterizer(colorizer, 256)
+    image = rasterizer.render(state)
+    colors = colorizer.sticker_color_indices(state.perm, state.ori)
+    palette = colorizer.compiled("sticker_table", colorizer.compile_sticker_colors)["palette"]
+    scale = rasterizer.width / colorizer.width
+    polygons = [colorizer.vertices[list(picking)] for picking in colorizer.get_polygons().values()]
+
+    checked = 0
+    for i, (points, color) in enumerate(zip(polygons, colors)):
+        if color < 0:
+            continue
+        column, row = (points.mean(axis=0) * scale).astype(int)
+        # Sample points of the centroid's pixel, which must lie well inside this polygon
+        xs = (column + np.linspace(0.1, 0.9, 4)) / scale
+        ys = (row + np.linspace(0.1, 0.9, 4)) / scale
+        inside, stroke = polygon_masks(points, xs, ys, 0.25)
+        covered = any(polygon_masks(later, xs, ys, 0.25)[0].any() for later in polygons[i + 1:])
+        if not inside.all() or stroke.any() or covered:
+            continue
+        assert tuple(image[row, column]) == parse_color(palette[color])
+        checked += 1
+    assert checked >= len(polygons) // 2
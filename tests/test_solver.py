@@ -0,0 +1,97 @@
+import dataclasses
+import shutil
+
+import pytest
+
+from cubevis.colorizer import get_colorizer
+from cubevis.scripts.images import make_batch_solver_string
+from cubevis.solver import (
+    BatchInput, SolverSession, SubgroupSpec, run_batch, run_batch_parallel, run_batch_scheduled,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs Node.js")
+
+ALGS = [
+    "R U R' U R U2 R'", "F R U R' U' F'", "R U R' U' R' F R F'", "R U2 R' U' R U' R'",
+    "U R U R' U R U2 R'", "U", "F U R U' R' F'", "r U R' U' r' F R F'", "F R U R' U' R U R' U' F'",
+]
+
+
+@pytest.fixture(scope="module")
+def oll_input():
+    colorizer = get_colorizer("3x3-OLL")
+    subgroups = [
+        SubgroupSpec(" ".join(row.split()[2:]), "6", row.split()[1])
+        for row in colorizer.get_prune_search_subgroup().splitlines()
+    ]
+    return BatchInput(
+        puzzle=colorizer.get_definitions(),
+        ignore=colorizer.get_equivalences(),
+        solve=make_batch_solver_string([colorizer.cube.normalize_moves(alg) for alg in ALGS]),
+        preAdjust=colorizer.get_pre_adjust(),
+        postAdjust=colorizer.get_post_adjust(),
+        subgroups=subgroups,
+    )
+
+
+@pytest.fixture(scope="module")
+def reference(oll_input):
+    return run_batch(oll_input, show_progress=False).to_dict()
+
+
+def test_session_matches_run_batch(oll_input, reference):
+    with SolverSession() as session:
+        assert session.run(oll_input, show_progress=False).to_dict() == reference
+        # Again with the cached tables, and once more after dropping them
+        assert run_batch(oll_input, session=session, show_progress=False).to_dict() == reference
+        session.clear()
+        assert session.run(oll_input, show_progress=False).to_dict() == reference
+
+
+@pytest.mark.parametrize("error", [ValueError, KeyboardInterrupt])
+def test_session_recovers_from_failing_callback(oll_input, reference, error):
+    def fail(msg):
+        if msg["type"] == "next-state":
+            raise error
+
+    with SolverSession() as session:
+        with pytest.raises(error):
+            session.run(oll_input, on_message=fail, show_progress=False)
+        # None of the failed batch's cases end up in the next one
+        assert session.run(oll_input, show_progress=False).to_dict() == reference
+
+
+def test_solve_cases_answers_every_setup(oll_input):
+    setups = [case.strip().rstrip(",") for case in oll_input.solve.strip("[]\n").splitlines()]
+    with SolverSession() as session:
+        solutions = session.solve_cases(oll_input, setups, show_progress=False)
+    assert len(solutions) == len(setups)
+    for setup, case_solutions in zip(setups, solutions):
+        single = run_batch(dataclasses.replace(oll_input, solve=f"[\n{setup}\n]"), show_progress=False)
+        assert case_solutions == (single.cases[0].solutions if single.cases else [])
+    # "U" is solved up to the adjust, so it has no case of its own
+    assert solutions[ALGS.index("U")] == []
+
+
+def test_parallel_matches_run_batch(oll_input, reference):
+    assert run_batch_parallel(oll_input, workers=3, show_progress=False).to_dict() == reference
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4])
+def test_scheduled_matches_run_batch(oll_input, reference, chunk_size):
+    messages = []
+    result = run_batch_scheduled(
+        oll_input, workers=2, chunk_size=chunk_size, on_message=messages.append, show_progress=False
+    )
+    assert result.to_dict() == reference
+    # Forwarded cases carry the numbers and setups of the whole batch, not of their chunk
+    forwarded = sorted((msg["value"]["num"], msg["value"]["setup"]) for msg in messages if msg["type"] == "next-state")
+    assert forwarded == [(case["case_num"], case["setup"]) for case in reference["cases"]]
+
+
+@pytest.mark.parametrize("disk_cache", [True, False])
+def test_threads_match_run_batch(oll_input, reference, monkeypatch, disk_cache):
+    if not disk_cache:
+        # Tables are then packed for the threads by run_worker.js instead of read from the cache
+        monkeypatch.setenv("CUBEVIS_NO_CACHE", "1")
+    assert run_batch(oll_input, threads=3, show_progress=False).to_dict() == reference